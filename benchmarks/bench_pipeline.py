@@ -0,0 +1,244 @@
+"""Offline benchmark for the full fetch -> filter -> dedup -> rank -> format pipeline.
+
+Replays the fixtures in benchmarks/fixtures through a local HTTP server, stubs
+tweet posting, and runs NewsBot.run_posting_cycle at several candidate counts.
+Reports wall time, per-stage time, peak traced memory and retained allocation
+blocks, and fails if a size regresses past benchmarks/baseline.json.
+
+    python benchmarks/bench_pipeline.py                     # 10, 1k and 100k stories
+    python benchmarks/bench_pipeline.py --sizes 10 1000
+    python benchmarks/bench_pipeline.py --update-baseline
+"""
+import argparse
+import email.utils
+import json
+import math
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from xml.sax.saxutils import escape
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(BENCH_DIR, 'fixtures')
+BASELINE_PATH = os.path.join(BENCH_DIR, 'baseline.json')
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+# The whole cycle must run to completion however large the feeds are
+os.environ.setdefault('FETCH_TIMEOUT', '600')
+os.environ.setdefault('FETCH_CYCLE_DEADLINE', '600')
+os.environ.setdefault('HTTP_MAX_RETRIES', '0')
+# Measure every stage over every story rather than stopping at the first breaking one
+os.environ.setdefault('STREAM_STOP_SCORE', 'inf')
+os.environ['METRICS_FILE'] = os.path.join(tempfile.gettempdir(), 'xbot-bench-metrics.json')
+
+import main  # noqa: E402
+from metrics import METRICS  # noqa: E402
+from sources import SOURCES  # noqa: E402
+
+DEFAULT_SIZES = [10, 1000, 100000]
+# Absolute slack so tiny runs don't flag scheduler noise as regressions
+NOISE_FLOOR = {'wall_seconds': 0.05, 'peak_mb': 1.0}
+STAGES = ['fetch_all', 'filter', 'dedup', 'rank', 'format', 'post', 'cycle']
+
+# Fixture served for each JSON source
+JSON_FIXTURES = {
+    'CoinGecko': 'coingecko_trending.json',
+    'Whale Alert': 'whale_alert.json',
+    'DeFiPulse': 'defipulse.json',
+    'Compound': 'compound_proposals.json',
+}
+
+
+class FixtureServer:
+    """Serves in-memory fixture bodies by path on 127.0.0.1"""
+
+    def __init__(self):
+        self.routes = {}
+        routes = self.routes
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body, content_type = routes.get(self.path, (b'{}', 'application/json'))
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def url(self, path):
+        return f'http://127.0.0.1:{self.server.server_address[1]}{path}'
+
+
+def slug(name):
+    return '/' + re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')
+
+
+def build_feed(items, vocabulary, count, rng):
+    """An RSS document with `count` recent entries varied from the fixture items"""
+    now = time.time()
+    entries = []
+    for i in range(count):
+        item = items[i % len(items)]
+        extra = ' '.join(rng.sample(vocabulary, 3))
+        published = email.utils.formatdate(now - rng.uniform(0, 20 * 3600), usegmt=True)
+        entries.append(
+            f"<item><title>{escape(item['title'])} {extra} {i}</title>"
+            f"<link>https://news.example.com/{i}-{rng.getrandbits(32):x}?utm_source=rss</link>"
+            f"<description>{escape(item['summary'])}</description>"
+            f"<pubDate>{published}</pubDate><guid>bench-{i}</guid></item>"
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel><title>bench</title>'
+        + ''.join(entries) + '</channel></rss>'
+    ).encode()
+
+
+def bench_sources(server, size, rng):
+    """Copies of the registered sources pointed at the fixture server, with RSS feeds sized so
+    the cycle sees roughly `size` stories"""
+    with open(os.path.join(FIXTURES_DIR, 'feed_items.json')) as f:
+        items = json.load(f)
+    vocabulary = sorted({word for item in items for word in re.findall(r'[a-z]{4,}', item['title'].lower())})
+
+    rss_sources = [src for src in SOURCES if src['kind'] == 'rss']
+    per_feed = math.ceil(size / len(rss_sources))
+    sources = []
+    for src in SOURCES:
+        src = dict(src, url=server.url(slug(src['name'])), max_age_hours=24)
+        if src['kind'] == 'rss':
+            src['limit'] = per_feed
+            server.routes[slug(src['name'])] = (build_feed(items, vocabulary, per_feed, rng), 'application/rss+xml')
+        else:
+            fixture = JSON_FIXTURES.get(src['name'])
+            body = b'{}'
+            if fixture:
+                with open(os.path.join(FIXTURES_DIR, fixture), 'rb') as f:
+                    body = f.read()
+            server.routes[slug(src['name'])] = (body, 'application/json')
+        sources.append(src)
+    return sources
+
+
+class StubResponse:
+    def __init__(self, tweet_id):
+        self.data = {'id': str(tweet_id)}
+
+
+def stub_create_tweet(text=None, **kwargs):
+    return StubResponse(int(time.time() * 1000))
+
+
+def run_cycle(sources, trace_memory):
+    """One cold cycle (fresh store and feed cache) over `sources`"""
+    workdir = tempfile.mkdtemp(prefix='xbot-bench-')
+    os.environ['STORE_PATH'] = os.path.join(workdir, 'newsbot.db')
+    os.environ['FEED_CACHE_PATH'] = os.path.join(workdir, 'feed_cache.json')
+    main.SOURCES[:] = sources
+    try:
+        bot = main.NewsBot()
+        bot.should_post_now = lambda: True
+        bot.client.create_tweet = stub_create_tweet
+        METRICS.reset()
+
+        if trace_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        bot.run_posting_cycle()
+        wall = time.perf_counter() - started
+        result = {'wall_seconds': round(wall, 4)}
+        if trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename'))
+            tracemalloc.stop()
+            result.update(peak_mb=round(peak / 2 ** 20, 2), retained_blocks=blocks)
+
+        summary = METRICS.summary()
+        result['stages'] = {
+            span['name']: round(span['total_seconds'], 4)
+            for span in summary['spans'] if not span['labels'] and span['name'] in STAGES
+        }
+        result['stories'] = {
+            f"{counter['labels']['stage']}_{counter['labels']['direction']}": counter['value']
+            for counter in summary['counters'] if counter['name'] == 'stage_stories'
+        }
+        bot.store.close()
+        return result
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def compare(results, baseline, tolerance):
+    """Regression messages for any size slower or bigger than baseline * (1 + tolerance)"""
+    failures = []
+    for size, result in results.items():
+        base = baseline.get(size)
+        if not base:
+            continue
+        for key in ('wall_seconds', 'peak_mb'):
+            if key in result and key in base and result[key] > base[key] * (1 + tolerance) + NOISE_FLOOR[key]:
+                failures.append(f"{size} stories: {key} {result[key]} > baseline {base[key]} (+{tolerance:.0%})")
+    return failures
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown vs baseline (0.25 = 25%%)')
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc pass')
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    # Benchmark output should be the report, not the bot's per-cycle logging
+    main.logging.getLogger().setLevel(main.logging.WARNING)
+    main.logging.getLogger('urllib3').setLevel(main.logging.ERROR)
+    server = FixtureServer()
+    results = {}
+    for size in args.sizes:
+        sources = bench_sources(server, size, random.Random(args.seed))
+        result = run_cycle(sources, trace_memory=False)
+        if not args.no_memory:
+            memory = run_cycle(sources, trace_memory=True)
+            result.update(peak_mb=memory['peak_mb'], retained_blocks=memory['retained_blocks'])
+        results[str(size)] = result
+        stages = ' '.join(f"{name}={result['stages'].get(name, 0):.3f}s" for name in STAGES)
+        memory_text = f" peak={result['peak_mb']}MB blocks={result['retained_blocks']}" if 'peak_mb' in result else ''
+        print(f"{size:>7} stories: wall={result['wall_seconds']:.3f}s{memory_text}")
+        print(f"         stages: {stages}")
+        print(f"         counts: {result['stories']}")
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+
+    if args.update_baseline:
+        baseline.update({size: {key: result[key] for key in ('wall_seconds', 'peak_mb') if key in result}
+                         for size, result in results.items()})
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Baseline written to {BASELINE_PATH}")
+        return 0
+
+    failures = compare(results, baseline, args.tolerance)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main_cli())
@@ -0,0 +1,63 @@
+"""Local stand-in for an OpenAI-compatible /v1/chat/completions endpoint.
+
+Answers the summarizer's batched prompt with one extractive post per story (its title,
+trimmed), after an optional delay, so summarization, caching and the latency budget can
+be exercised without a model:
+
+    python benchmarks/llm_standin.py --port 8001 --delay 0.3
+    SUMMARIZER_URL=http://127.0.0.1:8001/v1 python main.py
+"""
+import argparse
+import json
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STORY = re.compile(r'^Story (\d+): (.*)$', re.MULTILINE)
+
+
+def make_handler(delay):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if not self.path.rstrip('/').endswith('/chat/completions'):
+                self.send_error(404)
+                return
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            prompt = request['messages'][-1]['content']
+            posts = [{'id': int(number), 'text': title.strip()[:240]} for number, title in STORY.findall(prompt)]
+            time.sleep(delay)
+            body = json.dumps({
+                'id': 'standin',
+                'object': 'chat.completion',
+                'model': request.get('model', 'standin'),
+                'choices': [{
+                    'index': 0,
+                    'finish_reason': 'stop',
+                    'message': {'role': 'assistant', 'content': json.dumps({'posts': posts})}
+                }]
+            }).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--delay', type=float, default=0.0, help='seconds to wait before answering')
+    args = parser.parse_args()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args.delay))
+    print(f"Serving http://{args.host}:{server.server_address[1]}/v1/chat/completions")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main_cli()
@@ -0,0 +1,105 @@
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Consecutive failures that open a source's circuit
+BREAKER_FAILURE_THRESHOLD = int(os.getenv('BREAKER_FAILURE_THRESHOLD', '3'))
+# First cooldown (seconds); doubles each time a half-open probe fails
+BREAKER_COOLDOWN = float(os.getenv('BREAKER_COOLDOWN', '900'))
+BREAKER_MAX_COOLDOWN = float(os.getenv('BREAKER_MAX_COOLDOWN', '21600'))
+# Weight of the latest attempt in the success-rate / latency moving averages
+HEALTH_EMA_ALPHA = 0.2
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+def new_health():
+    return {
+        'state': CLOSED,
+        'failures': 0,
+        'opened_at': 0.0,
+        'cooldown': BREAKER_COOLDOWN,
+        'success_rate': 1.0,
+        'latency': 0.0,
+        'last_error': ''
+    }
+
+
+class CircuitBreakers:
+    """Per-source circuit breakers and health stats, persisted in the story store"""
+
+    def __init__(self, store):
+        self.store = store
+        self.lock = threading.Lock()
+        self.health = store.source_health()
+
+    def _get(self, name):
+        if name not in self.health:
+            self.health[name] = new_health()
+        return self.health[name]
+
+    def allow(self, name):
+        """Whether a source may be fetched now. An open circuit goes half-open (one probe) after its cooldown"""
+        with self.lock:
+            health = self._get(name)
+            if health['state'] != OPEN:
+                return True
+            if time.time() - health['opened_at'] < health['cooldown']:
+                return False
+            health['state'] = HALF_OPEN
+            self.store.save_source_health(name, health)
+            return True
+
+    def record_success(self, name, latency):
+        with self.lock:
+            health = self._get(name)
+            if health['state'] != CLOSED:
+                logger.info(f"{name} recovered, closing circuit")
+            health.update(state=CLOSED, failures=0, cooldown=BREAKER_COOLDOWN, last_error='')
+            self._update_stats(health, 1.0, latency)
+            self.store.save_source_health(name, health)
+
+    def record_failure(self, name, latency, error):
+        with self.lock:
+            health = self._get(name)
+            health['failures'] += 1
+            health['last_error'] = str(error)[:200]
+            self._update_stats(health, 0.0, latency)
+            if health['state'] == HALF_OPEN:
+                # Probe failed - back off harder
+                health['cooldown'] = min(health['cooldown'] * 2, BREAKER_MAX_COOLDOWN)
+                self._open(name, health)
+            elif health['state'] == CLOSED and health['failures'] >= BREAKER_FAILURE_THRESHOLD:
+                self._open(name, health)
+            self.store.save_source_health(name, health)
+
+    def _open(self, name, health):
+        health['state'] = OPEN
+        health['opened_at'] = time.time()
+        logger.warning(f"Opening circuit for {name} for {health['cooldown']/60:.0f}m after {health['failures']} failures")
+
+    def _update_stats(self, health, success, latency):
+        health['success_rate'] += HEALTH_EMA_ALPHA * (success - health['success_rate'])
+        if health['latency']:
+            health['latency'] += HEALTH_EMA_ALPHA * (latency - health['latency'])
+        else:
+            health['latency'] = latency
+
+    def log_summary(self):
+        """Log one line with every source's state, success rate and latency"""
+        now = time.time()
+        parts = []
+        with self.lock:
+            for name, health in sorted(self.health.items()):
+                part = f"{name} {health['state']} {health['success_rate']:.0%} {health['latency']*1000:.0f}ms"
+                if health['state'] == OPEN:
+                    retry_in = max(0, health['opened_at'] + health['cooldown'] - now)
+                    part += f" (retry in {retry_in/60:.0f}m)"
+                parts.append(part)
+        if parts:
+            logger.info("Source health: " + ' | '.join(parts))
@@ -0,0 +1,100 @@
+"""Text normalization applied once per story, where it enters the bot: markup stripped,
+entities decoded, unicode NFKC-normalized, invisible characters dropped and whitespace
+collapsed. Big batches (backfills, huge feeds) are cleaned in a process pool."""
+import html
+import logging
+import os
+import re
+import threading
+import unicodedata
+
+logger = logging.getLogger(__name__)
+
+# Batches at least this big go to the process pool; below it, pickling costs more than it saves
+CLEAN_PARALLEL_MIN = int(os.getenv('CLEAN_PARALLEL_MIN', '5000'))
+CLEAN_WORKERS = int(os.getenv('CLEAN_WORKERS', str(min(4, os.cpu_count() or 1))))
+SUMMARY_LIMIT = 1000
+
+_BLOCKS = re.compile(r'<(script|style)\b.*?</\1\s*>|<!--.*?-->', re.IGNORECASE | re.DOTALL)
+# Only real tags and declarations; a bare '<' in text ("5 < 10") is left alone
+_TAGS = re.compile(r'</?[A-Za-z!][^>]*>')
+# A tag the raw cut ended inside of
+_CUT_TAG = re.compile(r'<[A-Za-z!/][^>]*$')
+# Tags become spaces so block elements don't glue words together; undo that before punctuation
+_SPACE_BEFORE_PUNCT = re.compile(r' (?=[,.;:!?)\]])')
+# Control characters, soft hyphens and zero-width characters
+_INVISIBLE = dict.fromkeys([*range(0x00, 0x09), 0x0b, 0x0c, *range(0x0e, 0x20), 0x7f, 0xad,
+                            *range(0x200b, 0x2010), 0x2060, 0xfeff])
+# Raw HTML kept per character of cleaned summary; markup beyond that is never read
+RAW_PER_CLEAN = 4
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _strip_markup(text):
+    if '<!--' in text or '<s' in text or '<S' in text:
+        text = _BLOCKS.sub(' ', text)
+    return _TAGS.sub(' ', text)
+
+
+def clean_text(text, limit=None):
+    """Plain, single-spaced text from an HTML fragment, cut to `limit` on a word boundary"""
+    if not text:
+        return ''
+    if limit and len(text) > limit * RAW_PER_CLEAN:
+        text = _CUT_TAG.sub('', text[:limit * RAW_PER_CLEAN])
+    markup = '<' in text
+    if markup:
+        text = _strip_markup(text)
+    if '&' in text:
+        text = html.unescape(text)
+        # Feeds that escape their HTML twice decode to markup
+        if '<' in text:
+            text = _strip_markup(text)
+            markup = True
+    if not text.isascii():
+        text = unicodedata.normalize('NFKC', text)
+    text = ' '.join(text.translate(_INVISIBLE).split())
+    if markup:
+        text = _SPACE_BEFORE_PUNCT.sub('', text)
+    if limit and len(text) > limit:
+        text = text[:limit + 1].rsplit(' ', 1)[0] if ' ' in text[:limit] else text[:limit]
+    return text
+
+
+def clean_pair(pair):
+    """Clean one (title, summary) pair"""
+    title, summary = pair
+    return clean_text(title), clean_text(summary, SUMMARY_LIMIT)
+
+
+def clean_story(story):
+    """Clean a story's title and content in place (for sources that don't go through a feed)"""
+    story.title = clean_text(story.title)
+    story.content = clean_text(story.content, SUMMARY_LIMIT)
+    return story
+
+
+def _executor():
+    # Imported on first use: one-shot runs never see a feed big enough for the pool
+    global _pool
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a process that has fetch threads running isn't safe
+            _pool = ProcessPoolExecutor(max_workers=CLEAN_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+    return _pool
+
+
+def clean_pairs(pairs):
+    """clean_pair over a list, in the process pool when the batch is big enough to pay for it"""
+    if len(pairs) >= CLEAN_PARALLEL_MIN and CLEAN_WORKERS > 1:
+        from concurrent.futures.process import BrokenProcessPool
+        try:
+            chunksize = max(1, len(pairs) // (CLEAN_WORKERS * 4))
+            return list(_executor().map(clean_pair, pairs, chunksize=chunksize))
+        except (OSError, BrokenProcessPool) as e:
+            logger.warning(f"Cleaning {len(pairs)} entries in-process, process pool unavailable: {e}")
+    return [clean_pair(pair) for pair in pairs]
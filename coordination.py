@@ -0,0 +1,76 @@
+"""Coordination between bot instances sharing one store (SQLite on a shared volume).
+
+Every worker heartbeats into the store. One of them holds the posting lease and is the
+only one that picks stories and sends posts; the others just fetch. Sources are split
+between the live workers by rendezvous hashing, so each is polled by exactly one worker
+and only the sources of a worker that joins or leaves move."""
+import hashlib
+import logging
+import os
+import socket
+import time
+
+from metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+# Identifies this instance in the store; must differ between replicas
+WORKER_ID = os.getenv('WORKER_ID') or f"{socket.gethostname()}-{os.getpid()}"
+# Seconds between heartbeats; a worker silent for three of them is dropped from the split
+COORD_HEARTBEAT = float(os.getenv('COORD_HEARTBEAT', '30'))
+WORKER_TTL = 3 * COORD_HEARTBEAT
+# A leader that stops renewing loses the posting lease after this many seconds
+LEASE_TTL = float(os.getenv('LEASE_TTL', '90'))
+POSTER_LEASE = 'poster'
+
+
+def _weight(worker_id, source_name):
+    digest = hashlib.blake2b(f"{worker_id}\0{source_name}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+class Coordinator:
+    """This instance's view of the others: who's alive, which sources are ours, and
+    whether we hold the posting lease"""
+
+    def __init__(self, store, worker_id=WORKER_ID):
+        self.store = store
+        self.worker_id = worker_id
+        self.workers = [worker_id]
+        self.leader = False
+
+    def heartbeat(self):
+        """Announce ourselves, refresh the worker list and take or renew the posting lease"""
+        now = time.time()
+        self.store.heartbeat(self.worker_id, now)
+        workers = self.store.live_workers(now - WORKER_TTL)
+        if workers != self.workers:
+            logger.info(f"Workers: {', '.join(workers)}")
+            self.workers = workers
+        leader = self.store.acquire_lease(POSTER_LEASE, self.worker_id, LEASE_TTL)
+        if leader != self.leader:
+            logger.info(f"{self.worker_id} {'took' if leader else 'lost'} the posting lease")
+            self.leader = leader
+            METRICS.inc('lease_changes', result='taken' if leader else 'lost')
+        return leader
+
+    def owner(self, source_name):
+        """The live worker that fetches `source_name`"""
+        return max(self.workers, key=lambda worker_id: _weight(worker_id, source_name))
+
+    def owns(self, source_name):
+        return self.owner(source_name) == self.worker_id
+
+    def acquire_posting(self):
+        """Take the posting lease for a one-shot cycle. False if another instance holds it"""
+        self.leader = self.store.acquire_lease(POSTER_LEASE, self.worker_id, LEASE_TTL)
+        return self.leader
+
+    def release_posting(self):
+        self.store.release_lease(POSTER_LEASE, self.worker_id)
+        self.leader = False
+
+    def leave(self):
+        """Give up the lease and our sources now rather than when they time out"""
+        self.release_posting()
+        self.store.remove_worker(self.worker_id)
@@ -0,0 +1,224 @@
+import asyncio
+import logging
+import os
+import random
+import signal
+import threading
+import time
+
+from coordination import COORD_HEARTBEAT
+from dedup import SimhashIndex
+from keywords import keyword_score, match_story
+from metrics import METRICS
+from ranking import FRESHNESS_HOURS, static_score
+from story import Story
+
+logger = logging.getLogger(__name__)
+
+# Seconds between post checks when nothing new arrives
+DAEMON_POST_CHECK = float(os.getenv('DAEMON_POST_CHECK', '60'))
+# Once the rate-limit window opens, how long to hold out for a breaking story
+# before posting the best candidate we have
+DAEMON_PATIENCE = float(os.getenv('DAEMON_PATIENCE', '3600'))
+# Seconds between source health summaries
+DAEMON_HEALTH_LOG = float(os.getenv('DAEMON_HEALTH_LOG', '900'))
+
+
+class NewsDaemon:
+    """Polls its share of the sources, each on its own interval, into the candidate pool in
+    the store. Whichever instance holds the posting lease posts from that pool as soon as
+    the rate-limit window allows"""
+
+    def __init__(self, bot, sources):
+        self.bot = bot
+        self.sources = sources
+        self.coordinator = bot.coordinator
+        self.index = SimhashIndex()  # fingerprints of pooled candidates
+        self.enqueue_lock = threading.Lock()
+        self.window_opened_at = {}  # account -> when its rate-limit window opened
+        self.wake = None
+        self.outbox_wake = None
+
+    async def run(self):
+        """Run pollers and the poster until SIGINT/SIGTERM"""
+        self.wake = asyncio.Event()
+        self.outbox_wake = asyncio.Event()
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except NotImplementedError:
+                pass  # Windows
+
+        # Join before polling, so the first round already splits sources with the other workers
+        await asyncio.to_thread(self.coordinator.heartbeat)
+        self.rebuild_index()
+        tasks = [asyncio.create_task(self.poll(src), name=f"poll {src['name']}") for src in self.sources]
+        tasks.append(asyncio.create_task(self.coordination_loop(), name='coordination'))
+        tasks.append(asyncio.create_task(self.post_loop(), name='poster'))
+        tasks.append(asyncio.create_task(self.outbox_loop(), name='outbox'))
+        tasks.append(asyncio.create_task(self.health_loop(), name='health'))
+        owned = sum(self.coordinator.owns(src['name']) for src in self.sources)
+        logger.info(f"Daemon {self.coordinator.worker_id} polling {owned} of {len(self.sources)} sources")
+        await stop.wait()
+
+        logger.info("Shutting down daemon...")
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.bot.feed_cache.save()
+        self.coordinator.leave()
+
+    def fetch(self, src, incremental):
+        """Blocking fetch of one source (runs in a worker thread)"""
+        stories = self.bot.fetch_source(src, incremental)
+        if src['kind'] == 'rss':
+            self.bot.feed_cache.save()
+        return stories
+
+    async def poll(self, src):
+        """Fetch one source forever on its own interval, while this worker owns it"""
+        # Spread the first round out so every source doesn't fire at once
+        await asyncio.sleep(random.uniform(0, min(30, src['interval'])))
+        # The first fetch after taking a source over reads the whole feed, since entries
+        # may have arrived while another worker (or none) had it; later ones only pick
+        # up entries above the feed's high-water mark
+        incremental = False
+        while True:
+            if not self.coordinator.owns(src['name']):
+                incremental = False
+            else:
+                try:
+                    stories = await asyncio.to_thread(self.fetch, src, incremental)
+                    # Store writes can wait on another replica's lock, so keep them off the event loop
+                    if await asyncio.to_thread(self.enqueue, stories) and self.coordinator.leader:
+                        self.wake.set()
+                    incremental = True
+                except Exception as e:
+                    logger.error(f"Error fetching {src['name']}: {e}")
+            await asyncio.sleep(src['interval'] * random.uniform(0.9, 1.1))
+
+    def enqueue(self, stories):
+        """Add new, interesting, non-duplicate stories to the shared candidate pool (runs in a
+        worker thread). Returns how many were added"""
+        # One source at a time, so two pollers can't both let the same story past the index
+        with self.enqueue_lock:
+            _, new_stories = self.bot.select_candidates(stories, self.index)
+            with METRICS.span('rank'):
+                now = time.time()
+                candidates = []
+                for story in new_stories:
+                    story.queued_at = now
+                    candidates.append((story, self.bot.poster.account_for(story), static_score(story)))
+                added = self.bot.store.offer_candidates(candidates) if candidates else 0
+
+        if added:
+            logger.info(f"Pooled {added} new stories")
+        return added
+
+    def rebuild_index(self):
+        """Fingerprints of everything pooled, by any worker (posted ones are checked against the store)"""
+        index = SimhashIndex()
+        for fingerprint in self.bot.store.candidate_fingerprints():
+            index.add(fingerprint)
+        with self.enqueue_lock:
+            self.index = index
+
+    def candidates(self, account, count):
+        """The account's `count` best live candidates, discarding near-duplicates of posted stories"""
+        stories = []
+        for url, title, content, type, source, published, simhash, queued_at in self.bot.store.best_candidates(
+                account, FRESHNESS_HOURS, count):
+            if self.bot.store.near_posted(simhash):
+                self.bot.store.drop_candidate(url)
+                continue
+            story = Story(title, content, url, type, source, published)
+            story.simhash = simhash
+            story.queued_at = queued_at
+            stories.append(story)
+        return stories
+
+    async def coordination_loop(self):
+        """Heartbeat, follow workers joining and leaving, and take over posting if the leader dies"""
+        while True:
+            await asyncio.sleep(COORD_HEARTBEAT)
+            try:
+                was_leader = self.coordinator.leader
+                if await asyncio.to_thread(self.coordinator.heartbeat) and not was_leader:
+                    self.wake.set()
+                    self.outbox_wake.set()
+            except Exception as e:
+                logger.error(f"Coordination heartbeat failed: {e}")
+
+    async def post_loop(self):
+        """Queue a post as soon as an account's window is open and a breaking story is waiting"""
+        while True:
+            try:
+                await asyncio.wait_for(self.wake.wait(), timeout=DAEMON_POST_CHECK)
+            except asyncio.TimeoutError:
+                pass
+            self.wake.clear()
+
+            try:
+                if not self.coordinator.leader or not await asyncio.to_thread(self.bot.should_post_now):
+                    self.window_opened_at.clear()
+                    continue
+                accounts = await asyncio.to_thread(self.bot.open_accounts)
+            except Exception as e:
+                logger.error(f"Error checking the posting window: {e}")
+                continue
+            for account in accounts:
+                await self.consider(account)
+
+    async def consider(self, account):
+        """Hand the account's best candidate to the outbox if it's worth posting now"""
+        opened_at = self.window_opened_at.setdefault(account, time.time())
+        try:
+            stories = await asyncio.to_thread(self.candidates, account, self.bot.summarizer.batch_size)
+        except Exception as e:
+            logger.error(f"Error reading candidates: {e}")
+            return
+        if not stories:
+            return
+        story, upcoming = stories[0], stories[1:]
+        breaking = keyword_score(match_story(story)['title']) > 0
+        if not breaking and time.time() - opened_at < DAEMON_PATIENCE:
+            return
+
+        try:
+            # Formatting may wait on the summarizer, so keep it off the event loop.
+            # Queueing removes the story from the pool
+            if await asyncio.to_thread(self.bot.post_story, story, upcoming):
+                self.window_opened_at.pop(account, None)
+                self.outbox_wake.set()
+        except Exception as e:
+            logger.error(f"Error posting story: {e}")
+
+    async def outbox_loop(self):
+        """Send queued posts in a worker thread, so a slow or rate-limited X never holds up polling"""
+        while True:
+            next_due = None
+            try:
+                if self.coordinator.leader:
+                    await asyncio.to_thread(self.bot.poster.drain)
+                next_due = await asyncio.to_thread(self.bot.store.next_post_due)
+            except Exception as e:
+                logger.error(f"Error sending posts: {e}")
+            delay = DAEMON_POST_CHECK if next_due is None else min(DAEMON_POST_CHECK, max(5.0, next_due - time.time()))
+            try:
+                await asyncio.wait_for(self.outbox_wake.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            self.outbox_wake.clear()
+
+    async def health_loop(self):
+        """Log the per-source health summary, and drop expired and posted candidates, periodically"""
+        while True:
+            await asyncio.sleep(DAEMON_HEALTH_LOG)
+            try:
+                self.bot.breakers.log_summary()
+                await asyncio.to_thread(self.bot.store.prune)
+                await asyncio.to_thread(self.rebuild_index)
+            except Exception as e:
+                logger.error(f"Error pruning the store: {e}")
@@ -0,0 +1,140 @@
+import os
+import re
+from functools import lru_cache
+from hashlib import blake2b
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+
+# Titles within this many differing SimHash bits count as the same story. Tuned on
+# headline pairs from different outlets (tests/test_dedup.py): most rewrites of the
+# same story land within 14 bits, unrelated headlines on the same beat at 18 or more.
+# Fingerprints are split into DEDUP_MAX_DISTANCE // 2 + 1 bands, so any near
+# duplicate has a band that differs in at most one bit (pigeonhole). Lookups probe
+# each band and its one-bit neighbours instead of comparing against the whole history.
+DEDUP_MAX_DISTANCE = int(os.getenv('DEDUP_MAX_DISTANCE', '14'))
+BANDS = DEDUP_MAX_DISTANCE // 2 + 1
+BAND_BITS = 64 // BANDS
+# Bump when story_features changes; stored fingerprints from other versions are dropped
+FINGERPRINT_VERSION = 2
+
+TRACKING_PARAMS = {'fbclid', 'gclid', 'mc_cid', 'mc_eid', 'ref', 'ref_src', 'cmpid', 'ncid', 'guccounter'}
+
+STOPWORDS = {
+    'a', 'an', 'the', 'and', 'or', 'of', 'to', 'in', 'on', 'for', 'with', 'at', 'by',
+    'from', 'as', 'is', 'are', 'was', 'be', 'its', 'it', 'this', 'that', 'after', 'over'
+}
+
+TOKEN_RE = re.compile(r'[a-z0-9$%]+(?:[.,][0-9]+)*')
+
+
+def canonical_url(url):
+    """Normalize a story URL so tracking params, www., fragments and trailing slashes don't make it look new"""
+    parts = urlparse(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith('utm_') and key.lower() not in TRACKING_PARAMS
+    )
+    path = parts.path.rstrip('/') or '/'
+    scheme = 'https' if parts.scheme in ('http', 'https') else parts.scheme
+    return urlunparse((scheme, host, path, '', urlencode(query), ''))
+
+
+# Each bit of a byte spread into its own 24-bit lane, so weighted bit counts for
+# all 64 positions accumulate in a single big-int addition per feature
+LANE = 24
+LANE_MASK = (1 << LANE) - 1
+_BYTE_LANES = [sum(((byte >> i) & 1) << (LANE * i) for i in range(8)) for byte in range(256)]
+
+
+@lru_cache(maxsize=65536)
+def _feature_lanes(feature):
+    digest = int.from_bytes(blake2b(feature.encode(), digest_size=8).digest(), 'little')
+    lanes = 0
+    for k in range(8):
+        lanes |= _BYTE_LANES[(digest >> (8 * k)) & 0xFF] << (LANE * 8 * k)
+    return lanes
+
+
+def simhash(features):
+    """64-bit SimHash of a {feature: weight} mapping"""
+    acc = 0
+    total = 0
+    for feature, weight in features.items():
+        acc += weight * _feature_lanes(feature)
+        total += weight
+    fingerprint = 0
+    for i in range(64):
+        if 2 * ((acc >> (LANE * i)) & LANE_MASK) > total:
+            fingerprint |= 1 << i
+    return fingerprint
+
+
+# Headlines lead with the news; other outlets mostly reword or append to the tail
+# ("... in landmark decision"), so each title word weighs TITLE_DECAY times the one
+# before it. Amounts and figures tell stories apart, so they weigh more
+TITLE_WEIGHT = 100
+TITLE_DECAY = 0.9
+NUMBER_BOOST = 1.5
+# Summaries differ far more between outlets than headlines do, so only the
+# opening words count, at a low weight
+SUMMARY_TOKENS = 12
+SUMMARY_WEIGHT = 15
+
+
+def story_features(story):
+    """Position-weighted title words plus the opening summary words"""
+    features = {}
+    title = [token for token in TOKEN_RE.findall(story.title.lower()) if token not in STOPWORDS]
+    weight = TITLE_WEIGHT
+    for token in title:
+        boost = NUMBER_BOOST if token[0].isdigit() or token[0] == '$' else 1
+        features[token] = features.get(token, 0) + round(weight * boost)
+        weight *= TITLE_DECAY
+    summary = [token for token in TOKEN_RE.findall(story.content[:300].lower()) if token not in STOPWORDS]
+    for token in summary[:SUMMARY_TOKENS]:
+        features[token] = features.get(token, 0) + SUMMARY_WEIGHT
+    return features
+
+
+def story_fingerprint(story):
+    """SimHash for a story, computed once"""
+    if story.simhash is None:
+        story.simhash = simhash(story_features(story))
+    return story.simhash
+
+
+def bands(fingerprint):
+    """Split a fingerprint into BANDS integer bands"""
+    mask = (1 << BAND_BITS) - 1
+    return [(fingerprint >> (BAND_BITS * i)) & mask for i in range(BANDS)]
+
+
+def band_probes(fingerprint):
+    """For each band, its value and every value one bit away from it"""
+    return [[band] + [band ^ (1 << bit) for bit in range(BAND_BITS)] for band in bands(fingerprint)]
+
+
+def hamming(a, b):
+    return (a ^ b).bit_count()
+
+
+class SimhashIndex:
+    """In-memory banded index of fingerprints for near-duplicate lookup"""
+
+    def __init__(self):
+        self.buckets = [{} for _ in range(BANDS)]
+
+    def add(self, fingerprint):
+        for band, bucket in zip(bands(fingerprint), self.buckets):
+            bucket.setdefault(band, []).append(fingerprint)
+
+    def near(self, fingerprint, max_distance=DEDUP_MAX_DISTANCE):
+        """True if an indexed fingerprint is within max_distance bits"""
+        for probes, bucket in zip(band_probes(fingerprint), self.buckets):
+            for band in probes:
+                for candidate in bucket.get(band, ()):
+                    if hamming(candidate, fingerprint) <= max_distance:
+                        return True
+        return False
@@ -0,0 +1,145 @@
+import calendar
+import json
+import logging
+import os
+import threading
+
+from cleaner import clean_pair, clean_pairs
+
+logger = logging.getLogger(__name__)
+
+# Entries kept per feed; no source reads more than this
+MAX_CACHED_ENTRIES = 50
+
+
+def simplify_entry(entry, cleaned=None):
+    """Reduce a feedparser entry to the JSON-safe fields the bot uses, with clean title and summary text"""
+    title, summary = cleaned or clean_pair((entry.get('title', ''), entry.get('summary', '')))
+    published = entry.get('published_parsed')
+    return {
+        'title': title,
+        'summary': summary,
+        'link': entry.get('link', ''),
+        'id': entry_id(entry),
+        'published_parsed': list(published[:6]) if published else None
+    }
+
+
+def simplify_entries(entries):
+    """simplify_entry for a whole feed, cleaning its text as one batch"""
+    cleaned = clean_pairs([(entry.get('title', ''), entry.get('summary', '')) for entry in entries])
+    return [simplify_entry(entry, pair) for entry, pair in zip(entries, cleaned)]
+
+
+def entry_id(entry):
+    """Stable identity of a raw or simplified entry: its GUID, else its link"""
+    return entry.get('id') or entry.get('link', '')
+
+
+def entry_time(entry):
+    """Publication time of a raw or simplified entry as epoch seconds, or None if undated"""
+    published = entry.get('published_parsed')
+    # feedparser normalizes dates to UTC
+    return calendar.timegm(tuple(published[:6]) + (0, 0, 0)) if published else None
+
+
+class FeedCache:
+    """On-disk cache of ETag/Last-Modified validators, parsed entries and the high-water
+    mark (newest publication time and recent entry ids) per feed URL"""
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv('FEED_CACHE_PATH', 'feed_cache.json')
+        self.lock = threading.Lock()
+        self.dirty = False
+        self.feeds = {}
+        self.load()
+
+    def load(self):
+        """Load cached feeds, starting empty if the file is missing or corrupt"""
+        try:
+            with open(self.path, 'r') as f:
+                self.feeds = json.load(f)
+        except FileNotFoundError:
+            self.feeds = {}
+        except (ValueError, OSError) as e:
+            logger.warning(f"Ignoring unreadable feed cache {self.path}: {e}")
+            self.feeds = {}
+
+    def save(self):
+        """Write the cache if anything changed, atomically so a killed job can't corrupt it"""
+        with self.lock:
+            if not self.dirty:
+                return
+            tmp_path = self.path + '.tmp'
+            try:
+                with open(tmp_path, 'w') as f:
+                    json.dump(self.feeds, f)
+                os.replace(tmp_path, self.path)
+                self.dirty = False
+            except OSError as e:
+                logger.error(f"Failed to save feed cache: {e}")
+
+    def conditional_headers(self, url):
+        """Request headers that let the server answer 304 Not Modified"""
+        headers = {}
+        with self.lock:
+            cached = self.feeds.get(url)
+        if cached:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('modified'):
+                headers['If-Modified-Since'] = cached['modified']
+        return headers
+
+    def entries(self, url):
+        """Cached entries for a feed (used on 304)"""
+        with self.lock:
+            return self.feeds.get(url, {}).get('entries', [])
+
+    def store(self, url, etag, modified, entries):
+        """Remember a freshly parsed feed and its validators"""
+        with self.lock:
+            high_water = self.feeds.get(url, {}).get('high_water')
+            self.feeds[url] = {
+                'etag': etag,
+                'modified': modified,
+                'entries': entries[:MAX_CACHED_ENTRIES],
+                'high_water': high_water
+            }
+            self.dirty = True
+
+    def unseen(self, url, entries):
+        """Leading entries (feeds list newest first) up to the first one at or below the
+        feed's high-water mark"""
+        with self.lock:
+            high_water = self.feeds.get(url, {}).get('high_water')
+        if not high_water:
+            return list(entries)
+        seen_ids = set(high_water['ids'])
+        newest = high_water['published']
+        fresh = []
+        for entry in entries:
+            published = entry_time(entry)
+            if entry_id(entry) in seen_ids or (newest is not None and published is not None and published < newest):
+                break
+            fresh.append(entry)
+        return fresh
+
+    def advance(self, url, entries):
+        """Raise the feed's high-water mark past `entries` (simplified, newest first)"""
+        if not entries:
+            return
+        with self.lock:
+            feed = self.feeds.setdefault(url, {'etag': None, 'modified': None, 'entries': []})
+            high_water = feed.get('high_water') or {'published': None, 'ids': []}
+            times = [t for t in (entry_time(entry) for entry in entries) if t is not None]
+            if high_water['published'] is not None:
+                times.append(high_water['published'])
+            ids = [entry['id'] for entry in entries]
+            known = set(ids)
+            ids += [seen_id for seen_id in high_water['ids'] if seen_id not in known]
+            feed['high_water'] = {
+                'published': max(times) if times else None,
+                'ids': ids[:MAX_CACHED_ENTRIES]
+            }
+            self.dirty = True
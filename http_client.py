@@ -0,0 +1,117 @@
+import email.utils
+import logging
+import os
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+
+from metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', '2'))
+HTTP_BACKOFF_BASE = float(os.getenv('HTTP_BACKOFF_BASE', '0.5'))
+# Keep-alive connections kept per host
+HTTP_POOL_PER_HOST = int(os.getenv('HTTP_POOL_PER_HOST', '4'))
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+USER_AGENT = 'xbot-newsbot/1.0 (+https://github.com/nullm1nt/xbot)'
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """The process-wide pooled session every fetcher shares"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=32, pool_maxsize=HTTP_POOL_PER_HOST)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            # ACCEPT_ENCODING includes br when the brotli package is installed
+            session.headers.update({'User-Agent': USER_AGENT, 'Accept-Encoding': ACCEPT_ENCODING})
+            _session = session
+    return _session
+
+
+def retry_after_seconds(value):
+    """Parse a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _request_before(method, url, deadline, timeout, headers, json=None):
+    """One request whose response body must arrive before `deadline`"""
+    response = get_session().request(method, url, timeout=timeout, headers=headers, json=json, stream=True)
+    try:
+        chunks = []
+        for chunk in response.iter_content(chunk_size=16384):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"exceeded {timeout:.0f}s deadline")
+            chunks.append(chunk)
+        response._content = b''.join(chunks)
+    finally:
+        response.close()
+    return response
+
+
+def fetch_url(url, timeout=10, headers=None):
+    """GET a URL with `timeout` as a total deadline across the transfer and any retries.
+    Connection errors, 429 and 5xx are retried with jittered exponential backoff,
+    honouring Retry-After"""
+    deadline = time.monotonic() + timeout
+    attempt = 0
+    while True:
+        response, error = None, None
+        try:
+            response = _request_before('GET', url, deadline, max(0.1, deadline - time.monotonic()), headers)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            METRICS.inc('http_errors', host=urlparse(url).netloc, status=type(e).__name__)
+            error = e
+        if response is not None and response.status_code >= 400:
+            METRICS.inc('http_errors', host=urlparse(url).netloc, status=response.status_code)
+        if response is not None and response.status_code not in RETRY_STATUSES:
+            return response
+
+        delay = HTTP_BACKOFF_BASE * (2 ** attempt) * random.uniform(0.5, 1.5)
+        if response is not None:
+            retry_after = retry_after_seconds(response.headers.get('Retry-After'))
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+        if attempt >= HTTP_MAX_RETRIES or time.monotonic() + delay >= deadline:
+            if response is not None:
+                return response
+            raise error
+
+        reason = f"HTTP {response.status_code}" if response is not None else type(error).__name__
+        logger.warning(f"Retrying {urlparse(url).netloc} in {delay:.1f}s after {reason}")
+        time.sleep(delay)
+        attempt += 1
+
+
+def post_json(url, payload, timeout=10, headers=None):
+    """POST a JSON body with `timeout` as a hard total deadline and no retries, for callers
+    with a latency budget and a fallback of their own. Raises on errors and non-2xx"""
+    try:
+        response = _request_before('POST', url, time.monotonic() + timeout, timeout, headers, json=payload)
+    except (requests.ConnectionError, requests.Timeout, TimeoutError) as e:
+        METRICS.inc('http_errors', host=urlparse(url).netloc, status=type(e).__name__)
+        raise
+    if response.status_code >= 400:
+        METRICS.inc('http_errors', host=urlparse(url).netloc, status=response.status_code)
+    response.raise_for_status()
+    return response.json()
@@ -0,0 +1,133 @@
+import re
+
+# Keyword lists by category. A term may appear in several categories.
+KEYWORDS = {
+    # Any of these makes a story interesting
+    'priority': [
+        'breaking', 'urgent', 'alert', 'just in', 'developing',
+        'hack', 'exploit', 'vulnerability', 'breach', 'attack',
+        'surge', 'crash', 'skyrocket', 'plunge', 'rally', 'spike',
+        'record', 'all-time', 'new high', 'new low', 'milestone',
+        'launch', 'release', 'unveil', 'announce', 'partnership',
+        'acquisition', 'merger', 'ipo', 'funding', 'investment',
+        'billion', 'million', 'massive', 'huge', 'major',
+        'breakthrough', 'revolutionary', 'first ever', 'innovation',
+        'approval', 'regulation', 'ban', 'legal', 'court',
+        'dormant', 'whale', 'transfer', 'moved', 'activated'
+    ],
+    # Off-topic content
+    'exclude': [
+        'road', 'travel', 'transportation', 'geography', 'highway',
+        'recipe', 'cooking', 'food', 'restaurant', 'weather',
+        'sports', 'entertainment', 'celebrity', 'movie', 'music'
+    ],
+    # Ranking categories, matched against the title only
+    'breaking': ['breaking', 'urgent', 'alert'],
+    'security': ['hack', 'exploit', 'breach'],
+    'price': ['surge', 'crash', 'spike'],
+    'record': ['record', 'all-time', 'milestone'],
+}
+
+# Score added when a title hits a ranking category
+PRIORITY_WEIGHTS = {
+    'breaking': 1000,
+    'security': 800,
+    'price': 600,
+    'record': 400,
+}
+
+# Inflections accepted after a keyword, so 'hack' matches 'hackers' but 'ban' doesn't match 'bank'
+SUFFIXES = ('', 's', 'ed', 'ing', 'er', 'ers')
+# After a final 'e' the suffixes lose their own 'e' ('surge' -> 'surged', 'surging')
+E_SUFFIXES = ('', 's', 'd', 'r', 'rs')
+# Endings that take -es rather than -s ('crash' -> 'crashes')
+SIBILANTS = ('s', 'x', 'z', 'ch', 'sh')
+VOWELS = set('aeiou')
+
+
+def inflections(term):
+    """Every form of `term` that counts as a hit: the term plus the suffixes its ending takes,
+    and the spelling changes English makes before a suffix ('surge' -> 'surging',
+    'ban' -> 'banned', 'rally' -> 'rallies'). 'ban' doesn't take -d or -es, so it doesn't
+    match 'band' or 'banes'"""
+    last = term.rsplit(' ', 1)[-1]
+    if last.endswith('e'):
+        return {term + suffix for suffix in E_SUFFIXES} | {term[:-1] + 'ing'}
+    if last.endswith(SIBILANTS):
+        return {term + suffix for suffix in SUFFIXES if suffix != 's'} | {term + 'es'}
+    forms = {term + suffix for suffix in SUFFIXES}
+    if last.endswith('y') and len(last) > 1 and last[-2] not in VOWELS:
+        forms.update(term[:-1] + suffix for suffix in ('ies', 'ied'))
+    elif (len(last) >= 3 and last[-1] not in VOWELS | set('wxy') and last[-2] in VOWELS
+          and last[-3] not in VOWELS):
+        # Doubled final consonant; not before -er, which would make 'ban' match 'banner'
+        forms.update(term + last[-1] + suffix for suffix in ('ed', 'ing'))
+    return forms
+
+
+def trie_pattern(terms):
+    """Regex alternation for `terms` with shared prefixes factored out, so matching cost
+    doesn't grow with the number of terms"""
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    return _node_pattern(trie)
+
+
+def _node_pattern(node):
+    terminal = '' in node
+    branches = []
+    for char, child in sorted(node.items()):
+        if char:
+            piece = r'\s+' if char == ' ' else re.escape(char)
+            branches.append(piece + _node_pattern(child))
+    if not branches:
+        return ''
+    if len(branches) == 1 and not terminal:
+        return branches[0]
+    group = '(?:' + '|'.join(branches) + ')'
+    return group + '?' if terminal else group
+
+
+class KeywordMatcher:
+    """Finds every keyword category in a text with one compiled, word-bounded regex"""
+
+    def __init__(self, categories):
+        self.form_categories = {}
+        for category, terms in categories.items():
+            for term in terms:
+                for form in inflections(term.lower()):
+                    self.form_categories.setdefault(form, set()).add(category)
+        self.form_categories = {form: frozenset(cats) for form, cats in self.form_categories.items()}
+        # Texts are lowercased before matching rather than matched with IGNORECASE: a
+        # case-insensitive hit such as 'İ' can lowercase to a form that isn't in the table
+        self.pattern = re.compile(rf"\b({trie_pattern(self.form_categories)})\b")
+
+    def categories(self, text):
+        """Frozen set of categories with at least one keyword hit in `text`"""
+        hits = frozenset()
+        for match in self.pattern.finditer(text.lower()):
+            hits |= self.form_categories[' '.join(match.group(1).split())]
+        return hits
+
+
+MATCHER = KeywordMatcher(KEYWORDS)
+
+
+def match_story(story):
+    """Keyword categories for a story's title and for title + content, computed once per story"""
+    if story.matches is None:
+        title_hits = MATCHER.categories(story.title)
+        story.matches = {
+            'title': title_hits,
+            'all': title_hits | MATCHER.categories(story.content)
+        }
+    return story.matches
+
+
+def keyword_score(categories):
+    """Ranking score for a set of matched categories"""
+    return sum(PRIORITY_WEIGHTS.get(category, 0) for category in categories)
@@ -1,64 +1,98 @@
-import tweepy
-import requests
 import time
+# Imports are timed for the startup report
+IMPORT_STARTED = time.perf_counter()
 import os
 import json
-import feedparser
-from datetime import datetime, timedelta
+from datetime import datetime
 from dotenv import load_dotenv
 import logging
 import random
 import re
-from urllib.parse import urlparse
-
+# Before the local imports: their module-level settings read the environment at import
 load_dotenv()
+from feed_cache import FeedCache, simplify_entries
+from cleaner import clean_story
+from http_client import fetch_url
+from sources import SOURCES
+from keywords import match_story
+from store import StoryStore
+from breaker import CircuitBreakers
+from metrics import METRICS
+from dedup import SimhashIndex, canonical_url, story_fingerprint
+from story import set_ages
+from pipeline import select_best
+from poster import DEFAULT_ACCOUNT, Poster, load_accounts
+from summarizer import Summarizer, content_hash
+from coordination import Coordinator
+IMPORT_SECONDS = time.perf_counter() - IMPORT_STARTED
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Seconds each source gets end to end (the cycle-wide deadline is in pipeline.py)
+FETCH_TIMEOUT = float(os.getenv('FETCH_TIMEOUT', '10'))
+# Follow each post with replies carrying the story's summary and source link
+POST_THREADS = os.getenv('POST_THREADS', '').lower() in ('1', 'true', 'yes')
+# Minimum seconds between posts on each account, across every instance sharing the store
+POST_SPACING = 7200
+# Scheduled one-shot runs start a few minutes early or late, so they count an account's
+# window as open this many seconds before POST_SPACING is up
+SCHEDULE_SLACK = float(os.getenv('SCHEDULE_SLACK', '600'))
+# Characters summarize_news drops from titles
+TITLE_UNSAFE = re.compile(r'[^\w\s$%:.-]')
+
 class NewsBot:
     def __init__(self):
+        init_started = time.perf_counter()
         self.setup_twitter_client()
-        self.posted_stories = set()
+        self.feed_cache = FeedCache()
+        self.store = StoryStore()
+        self.breakers = CircuitBreakers(self.store)
+        self.poster = Poster(self.store, self.accounts)
+        self.summarizer = Summarizer(self.store)
+        self.coordinator = Coordinator(self.store)
+        # Cron runs start late by up to SCHEDULE_SLACK, so a run exactly one spacing after
+        # a late one must still post
+        self.post_spacing = POST_SPACING - SCHEDULE_SLACK if os.getenv('GITHUB_ACTIONS') else POST_SPACING
         self.load_posted_stories()
-        self.last_post_time = None
+        self.store.prune()
+        self.report_startup(init_started)
+        
+    def report_startup(self, init_started):
+        """Log and record how long imports and initialization took"""
+        now = time.perf_counter()
+        init = now - init_started
+        METRICS.observe('startup', IMPORT_SECONDS, phase='import')
+        METRICS.observe('startup', init, phase='init')
+        logger.info(f"Startup took {(IMPORT_SECONDS + init) * 1000:.0f}ms "
+                    f"(imports {IMPORT_SECONDS * 1000:.0f}ms, init {init * 1000:.0f}ms)")
         
     def setup_twitter_client(self):
-        """Initialize Twitter API client"""
-        try:
-            self.client = tweepy.Client(
-                consumer_key=os.getenv('TWITTER_API_KEY'),
-                consumer_secret=os.getenv('TWITTER_API_SECRET'),
-                access_token=os.getenv('TWITTER_ACCESS_TOKEN'),
-                access_token_secret=os.getenv('TWITTER_ACCESS_TOKEN_SECRET'),
-                bearer_token=os.getenv('TWITTER_BEARER_TOKEN'),
-                wait_on_rate_limit=True
-            )
-            logger.info("Twitter client initialized successfully")
-        except Exception as e:
-            logger.error(f"Failed to initialize Twitter client: {e}")
+        """Configure Twitter accounts: the default one, plus any per-type accounts.
+        Their clients are only built when something is posted"""
+        self.accounts = load_accounts({src['type'] for src in SOURCES})
+        logger.info(f"Twitter accounts configured: {', '.join(self.accounts)}")
+        
+    @property
+    def client(self):
+        """The default account's Twitter client"""
+        return self.accounts[DEFAULT_ACCOUNT].client
             
     def load_posted_stories(self):
-        """Load previously posted stories to avoid duplicates"""
+        """Import posted stories from the legacy POSTED_STORIES env var / posted_stories.json into the store"""
+        posted_urls = os.getenv('POSTED_STORIES', '')
+        if posted_urls:
+            self.store.import_posted(posted_urls.split(','))
         try:
-            # Use environment variable for GitHub Actions
-            posted_urls = os.getenv('POSTED_STORIES', '')
-            if posted_urls:
-                self.posted_stories = set(posted_urls.split(','))
-            else:
-                with open('posted_stories.json', 'r') as f:
-                    self.posted_stories = set(json.load(f))
+            with open('posted_stories.json', 'r') as f:
+                self.store.import_posted(json.load(f))
+            # Imported once; the store is the source of truth from now on
+            os.replace('posted_stories.json', 'posted_stories.json.migrated')
         except FileNotFoundError:
-            self.posted_stories = set()
-            
-    def save_posted_stories(self):
-        """Save posted stories to file (local only)"""
-        try:
-            with open('posted_stories.json', 'w') as f:
-                json.dump(list(self.posted_stories), f)
-        except:
-            pass  # Ignore errors in GitHub Actions
+            pass
+        except (ValueError, OSError) as e:
+            logger.error(f"Failed to import posted_stories.json: {e}")
             
     def get_news_apis(self):
         """Get additional news sources"""
@@ -68,152 +102,79 @@ class NewsBot:
             'alphavantage': f'https://www.alphavantage.co/query?function=NEWS_SENTIMENT&tickers=CRYPTO:BTC,CRYPTO:ETH&apikey={os.getenv("ALPHA_VANTAGE_KEY", "")}'
         }
         
-    def get_crypto_news(self):
-        """Fetch crypto news from multiple sources"""
-        stories = []
-        
-        # CoinGecko trending
-        try:
-            response = requests.get('https://api.coingecko.com/api/v3/search/trending', timeout=10)
-            if response.status_code == 200:
-                trending = response.json()['coins'][:3]
-                for coin in trending:
-                    story = {
-                        'title': f"{coin['item']['name']} ({coin['item']['symbol']}) trending on CoinGecko",
-                        'content': f"Market cap rank: #{coin['item']['market_cap_rank']}",
-                        'url': f"https://www.coingecko.com/en/coins/{coin['item']['id']}",
-                        'type': 'crypto',
-                        'source': 'CoinGecko'
-                    }
-                    stories.append(story)
-        except Exception as e:
-            logger.error(f"Error fetching CoinGecko trending: {e}")
-            
-        # CoinDesk RSS - last 24 hours
-        try:
-            feed = feedparser.parse('https://www.coindesk.com/arc/outboundfeeds/rss/')
-            current_time = datetime.now()
-            for entry in feed.entries[:20]:
-                if hasattr(entry, 'published_parsed') and entry.published_parsed:
-                    article_time = datetime(*entry.published_parsed[:6])
-                    hours_old = (current_time - article_time).total_seconds() / 3600
-                    if hours_old > 24:
-                        continue
-                        
-                story = {
-                    'title': entry.title,
-                    'content': entry.summary[:300] if hasattr(entry, 'summary') else '',
-                    'url': entry.link,
-                    'type': 'crypto',
-                    'source': 'CoinDesk',
-                    'published': article_time,
-                    'hours_old': hours_old
-                }
-                stories.append(story)
-        except Exception as e:
-            logger.error(f"Error fetching CoinDesk RSS: {e}")
+    def fetch_source(self, src, incremental=False):
+        """Fetch one registered source through its circuit breaker and map it to stories with canonical URLs.
+        `incremental` RSS fetches return only entries not seen on an earlier fetch"""
+        name = src['name']
+        if not self.breakers.allow(name):
+            METRICS.inc('breaker_skips', source=name)
+            return []
             
-        # Cointelegraph RSS
+        started = time.monotonic()
         try:
-            feed = feedparser.parse('https://cointelegraph.com/rss')
-            current_time = datetime.now()
-            for entry in feed.entries[:15]:
-                if hasattr(entry, 'published_parsed') and entry.published_parsed:
-                    article_time = datetime(*entry.published_parsed[:6])
-                    hours_old = (current_time - article_time).total_seconds() / 3600
-                    if hours_old > 24:
-                        continue
-                        
-                story = {
-                    'title': entry.title,
-                    'content': entry.summary[:300] if hasattr(entry, 'summary') else '',
-                    'url': entry.link,
-                    'type': 'crypto',
-                    'source': 'Cointelegraph',
-                    'published': article_time,
-                    'hours_old': hours_old
-                }
-                stories.append(story)
+            with METRICS.span('fetch', source=name):
+                timeout = src['timeout'] or FETCH_TIMEOUT
+                if src['kind'] == 'rss':
+                    stories = self.fetch_rss(src, timeout, incremental)
+                else:
+                    response = fetch_url(src['url'], timeout=timeout)
+                    response.raise_for_status()
+                    with METRICS.span('parse', source=name):
+                        stories = [clean_story(story) for story in src['parse'](response.json(), src)]
         except Exception as e:
-            logger.error(f"Error fetching Cointelegraph RSS: {e}")
+            self.breakers.record_failure(name, time.monotonic() - started, e)
+            METRICS.inc('fetch_errors', source=name)
+            raise
+        self.breakers.record_success(name, time.monotonic() - started)
+        
+        for story in stories:
+            story.url = canonical_url(story.url)
+        METRICS.inc('stage_stories', len(stories), stage='fetch', direction='out')
+        return stories
+        
+    def fetch_rss(self, src, timeout, incremental=False):
+        """Fetch an RSS feed (conditionally, via the feed cache) and map its recent entries.
+        With `incremental`, only entries above the feed's high-water mark are mapped"""
+        url = src['url']
+        response = fetch_url(url, timeout=timeout, headers=self.feed_cache.conditional_headers(url))
+        if response.status_code == 304:
+            # Unchanged since last run - reuse the parsed entries
+            METRICS.inc('feed_cache', result='hit')
+            entries = [] if incremental else self.feed_cache.entries(url)
+        else:
+            response.raise_for_status()
+            METRICS.inc('feed_cache', result='miss')
+            # Only imported once some feed has actually changed
+            import feedparser
+            with METRICS.span('parse', source=src['name']):
+                feed = feedparser.parse(response.content, response_headers=dict(response.headers))
+                if incremental:
+                    # Stop at the first entry seen last time; the rest are already cached
+                    entries = simplify_entries(self.feed_cache.unseen(url, feed.entries))
+                    new_ids = {entry['id'] for entry in entries}
+                    cached = entries + [entry for entry in self.feed_cache.entries(url) if entry['id'] not in new_ids]
+                else:
+                    entries = cached = simplify_entries(feed.entries)
+            self.feed_cache.store(url, response.headers.get('ETag'), response.headers.get('Last-Modified'), cached)
             
-        # CryptoSlate RSS
-        try:
-            feed = feedparser.parse('https://cryptoslate.com/feed/')
-            current_time = datetime.now()
-            for entry in feed.entries[:10]:
-                if hasattr(entry, 'published_parsed') and entry.published_parsed:
-                    article_time = datetime(*entry.published_parsed[:6])
-                    hours_old = (current_time - article_time).total_seconds() / 3600
-                    if hours_old > 24:
-                        continue
-                        
-                story = {
-                    'title': entry.title,
-                    'content': entry.summary[:300] if hasattr(entry, 'summary') else '',
-                    'url': entry.link,
-                    'type': 'crypto',
-                    'source': 'CryptoSlate',
-                    'published': article_time,
-                    'hours_old': hours_old
-                }
+        entries = entries[:src['limit']]
+        self.feed_cache.advance(url, entries)
+        METRICS.inc('feed_entries', len(entries), source=src['name'])
+        current_time = time.time()
+        stories = []
+        for entry in entries:
+            story = src['parse'](entry, src, current_time)
+            if story:
                 stories.append(story)
-        except Exception as e:
-            logger.error(f"Error fetching CryptoSlate RSS: {e}")
-            
-        # On-chain data sources
-        try:
-            # Whale Alert API (free tier)
-            whale_response = requests.get('https://api.whale-alert.io/v1/transactions?api_key=demo&min_value=1000000', timeout=10)
-            if whale_response.status_code == 200:
-                whale_data = whale_response.json()
-                for tx in whale_data.get('transactions', [])[:3]:
-                    if tx.get('blockchain') in ['bitcoin', 'ethereum']:
-                        amount = tx.get('amount', 0)
-                        if amount > 10000000:  # $10M+ transactions
-                            story = {
-                                'title': f"Whale Alert: {amount/1000000:.1f}M {tx.get('symbol', 'crypto').upper()} moved",
-                                'content': f"Large transaction detected on {tx.get('blockchain')} blockchain",
-                                'url': f"https://whale-alert.io/transaction/{tx.get('hash', '')}",
-                                'type': 'crypto',
-                                'source': 'Whale Alert',
-                                'published': datetime.now(),
-                                'hours_old': 0
-                            }
-                            stories.append(story)
-        except Exception as e:
-            logger.error(f"Error fetching Whale Alert: {e}")
-            
-        # DeFiPulse API for DeFi protocol updates
-        try:
-            defi_response = requests.get('https://api.defipulse.com/v1/defi', timeout=10)
-            if defi_response.status_code == 200:
-                defi_data = defi_response.json()
-                for protocol in defi_data[:3]:
-                    if protocol.get('change_1d', 0) > 20:  # 20%+ daily change
-                        story = {
-                            'title': f"{protocol.get('name')} TVL {protocol.get('change_1d', 0):.1f}% in 24h",
-                            'content': f"Total Value Locked: ${protocol.get('value', 0)/1000000:.1f}M",
-                            'url': f"https://defipulse.com/{protocol.get('slug', '')}",
-                            'type': 'crypto',
-                            'source': 'DeFiPulse',
-                            'published': datetime.now(),
-                            'hours_old': 0
-                        }
-                        stories.append(story)
-        except Exception as e:
-            logger.error(f"Error fetching DeFiPulse: {e}")
-            
         return stories
         
     def summarize_news(self, story):
         """Create a WatcherGuru-style summary"""
-        title = story['title']
-        content = story.get('content', '')
+        title = story.title
+        content = story.content
         
-        # Clean title
-        title = re.sub(r'[^\w\s$%:.-]', '', title)
-        title = title.replace('\n', ' ').strip()
+        # Clean title (markup and whitespace were already normalized when it was fetched)
+        title = TITLE_UNSAFE.sub('', title).strip()
         
         # Extract key info
         breaking_keywords = ['breaking', 'urgent', 'alert', 'just in', 'developing']
@@ -236,160 +197,96 @@ class NewsBot:
             
         return summary
         
-    def get_ai_news(self):
-        """Fetch AI news from multiple sources"""
-        stories = []
-        
-        # VentureBeat AI RSS
-        try:
-            feed = feedparser.parse('https://venturebeat.com/category/ai/feed/')
-            current_time = datetime.now()
-            for entry in feed.entries[:10]:
-                if hasattr(entry, 'published_parsed') and entry.published_parsed:
-                    article_time = datetime(*entry.published_parsed[:6])
-                    hours_old = (current_time - article_time).total_seconds() / 3600
-                    if hours_old > 24:
-                        continue
-                        
-                story = {
-                    'title': entry.title,
-                    'content': entry.summary[:300] if hasattr(entry, 'summary') else '',
-                    'url': entry.link,
-                    'type': 'ai',
-                    'source': 'VentureBeat',
-                    'published': article_time,
-                    'hours_old': hours_old
-                }
-                stories.append(story)
-        except Exception as e:
-            logger.error(f"Error fetching VentureBeat AI: {e}")
-            
-        # TechCrunch AI RSS
-        try:
-            feed = feedparser.parse('https://techcrunch.com/category/artificial-intelligence/feed/')
-            current_time = datetime.now()
-            for entry in feed.entries[:10]:
-                if hasattr(entry, 'published_parsed') and entry.published_parsed:
-                    article_time = datetime(*entry.published_parsed[:6])
-                    hours_old = (current_time - article_time).total_seconds() / 3600
-                    if hours_old > 24:
-                        continue
-                        
-                story = {
-                    'title': entry.title,
-                    'content': entry.summary[:300] if hasattr(entry, 'summary') else '',
-                    'url': entry.link,
-                    'type': 'ai',
-                    'source': 'TechCrunch',
-                    'published': article_time,
-                    'hours_old': hours_old
-                }
-                stories.append(story)
-        except Exception as e:
-            logger.error(f"Error fetching TechCrunch AI: {e}")
-            
-        # AI News RSS
-        try:
-            feed = feedparser.parse('https://www.artificialintelligence-news.com/feed/')
-            current_time = datetime.now()
-            for entry in feed.entries[:10]:
-                if hasattr(entry, 'published_parsed') and entry.published_parsed:
-                    article_time = datetime(*entry.published_parsed[:6])
-                    hours_old = (current_time - article_time).total_seconds() / 3600
-                    if hours_old > 24:
-                        continue
-                        
-                story = {
-                    'title': entry.title,
-                    'content': entry.summary[:300] if hasattr(entry, 'summary') else '',
-                    'url': entry.link,
-                    'type': 'ai',
-                    'source': 'AI News',
-                    'published': article_time,
-                    'hours_old': hours_old
-                }
-                stories.append(story)
-        except Exception as e:
-            logger.error(f"Error fetching AI News: {e}")
-            
-        # Mirror Protocol (Terra ecosystem)
-        try:
-            mirror_response = requests.get('https://graph.mirror.finance/graphql', timeout=10)
-            # Add Mirror data processing here
-        except Exception as e:
-            logger.error(f"Error fetching Mirror data: {e}")
-            
-        # Compound Protocol governance
-        try:
-            compound_response = requests.get('https://api.compound.finance/api/v2/governance/proposals', timeout=10)
-            if compound_response.status_code == 200:
-                proposals = compound_response.json()
-                for proposal in proposals.get('proposals', [])[:2]:
-                    if proposal.get('state') == 'Active':
-                        story = {
-                            'title': f"Compound Governance: {proposal.get('title', 'New proposal')}",
-                            'content': f"Proposal #{proposal.get('id')} is live for voting",
-                            'url': f"https://compound.finance/governance/proposals/{proposal.get('id')}",
-                            'type': 'crypto',
-                            'source': 'Compound',
-                            'published': datetime.now(),
-                            'hours_old': 0
-                        }
-                        stories.append(story)
-        except Exception as e:
-            logger.error(f"Error fetching Compound governance: {e}")
-            
-        return stories
-        
     def filter_interesting_stories(self, stories):
         """Filter stories for important/breaking news"""
-        high_priority_keywords = [
-            'breaking', 'urgent', 'alert', 'just in', 'developing',
-            'hack', 'exploit', 'vulnerability', 'breach', 'attack',
-            'surge', 'crash', 'skyrocket', 'plunge', 'rally', 'spike',
-            'record', 'all-time', 'new high', 'new low', 'milestone',
-            'launch', 'release', 'unveil', 'announce', 'partnership',
-            'acquisition', 'merger', 'ipo', 'funding', 'investment',
-            'billion', 'million', 'massive', 'huge', 'major',
-            'breakthrough', 'revolutionary', 'first ever', 'innovation',
-            'approval', 'regulation', 'ban', 'legal', 'court',
-            'dormant', 'whale', 'transfer', 'moved', 'activated'
-        ]
-        
-        exclude_keywords = [
-            'road', 'travel', 'transportation', 'geography', 'highway',
-            'recipe', 'cooking', 'food', 'restaurant', 'weather',
-            'sports', 'entertainment', 'celebrity', 'movie', 'music'
-        ]
-        
         filtered_stories = []
         for story in stories:
-            story_text = (story['title'] + ' ' + story.get('content', '')).lower()
+            hits = match_story(story)['all']
             
             # Skip excluded content
-            if any(keyword in story_text for keyword in exclude_keywords):
+            if 'exclude' in hits:
                 continue
                 
             # Include high priority or recent stories
-            if (any(keyword in story_text for keyword in high_priority_keywords) or 
-                story.get('hours_old', 999) < 6):
+            if 'priority' in hits or (story.hours_old is not None and story.hours_old < 6):
                 filtered_stories.append(story)
                 
         return filtered_stories
         
-    def format_post(self, story):
+    def dedupe_stories(self, stories, index=None):
+        """Drop stories already posted, by canonical URL or near-duplicate title/summary.
+        `index` holds fingerprints of stories already accepted (this cycle, or the daemon's queue)"""
+        posted = self.store.posted_among(story.url for story in stories)
+        posted_index = self.store.posted_index()
+        cycle_index = SimhashIndex() if index is None else index
+        new_stories = []
+        for story in stories:
+            if story.url in posted:
+                continue
+            fingerprint = story_fingerprint(story)
+            # Same event from another source this cycle, or already posted
+            if cycle_index.near(fingerprint) or posted_index.near(fingerprint):
+                continue
+            cycle_index.add(fingerprint)
+            new_stories.append(story)
+        return new_stories
+        
+    def normalize_stories(self, stories):
+        """Set ages against one `now` and reuse keyword matches from earlier cycles"""
+        # One `now` for the whole batch, so filtering and ranking agree on ages
+        set_ages(stories, time.time())
+        
+        # Reuse keyword matches for candidates scored in earlier cycles
+        known = self.store.known_matches(story.url for story in stories)
+        for story in stories:
+            if story.url in known:
+                story.matches = known[story.url]
+        
+    def select_candidates(self, stories, index=None):
+        """Filter fetched stories for interesting ones, then drop posted/duplicate ones.
+        Returns (interesting, new)"""
+        self.normalize_stories(stories)
+        
+        with METRICS.span('filter'):
+            interesting_stories = self.filter_interesting_stories(stories)
+        self.store.record_seen(stories)
+        METRICS.inc('stage_stories', len(stories), stage='filter', direction='in')
+        METRICS.inc('stage_stories', len(interesting_stories), stage='filter', direction='out')
+        
+        with METRICS.span('dedup'):
+            new_stories = self.dedupe_stories(interesting_stories, index)
+        METRICS.inc('stage_stories', len(interesting_stories), stage='dedup', direction='in')
+        METRICS.inc('stage_stories', len(new_stories), stage='dedup', direction='out')
+        return interesting_stories, new_stories
+        
+    def format_post(self, story, summary=None):
         """Format story into WatcherGuru-style simple post"""
-        # Use the summarize_news method for clean formatting
-        return self.summarize_news(story)
+        # The model's summary when one was written in time,
+        # else the summarize_news method for clean formatting
+        return summary or self.summarize_news(story)
         
-    def check_rate_limit(self):
-        """Check if enough time has passed since last post"""
-        if self.last_post_time is None:
-            return True
+    def format_thread(self, story, summary=None):
+        """The post for a story, followed by its thread replies when POST_THREADS is on"""
+        posts = [self.format_post(story, summary)]
+        if POST_THREADS:
+            content = ' '.join(story.content.split())
+            if content:
+                posts.append(content if len(content) <= 280 else content[:277] + '...')
+            if story.url:
+                posts.append(f"Source: {story.url}")
+        return posts
         
-        # Minimum 2 hours between posts
-        time_diff = time.time() - self.last_post_time
-        return time_diff >= 7200  # 2 hours
+    def check_rate_limit(self, account=None):
+        """Check if enough time has passed since `account` (or, by default, any account) last posted"""
+        accounts = [account] if account else list(self.accounts)
+        # Minimum 2 hours between posts on each account. Post times live in the store,
+        # so this holds across restarts and across instances
+        now = time.time()
+        for name in accounts:
+            last = self.store.last_post_time(name)
+            if last is None or now - last >= self.post_spacing:
+                return True
+        return False
         
     def should_post_now(self):
         """Check if we should post based on time and rate limiting"""
@@ -402,18 +299,49 @@ class NewsBot:
         # Check rate limit
         return self.check_rate_limit()
         
-    def post_to_twitter(self, content):
-        """Post content to Twitter"""
-        try:
-            response = self.client.create_tweet(text=content)
-            logger.info(f"Successfully posted tweet: {response.data['id']}")
-            return True
-        except Exception as e:
-            logger.error(f"Failed to post tweet: {e}")
+    def open_accounts(self):
+        """Accounts whose 2-hour window is open"""
+        return [name for name in self.accounts if self.check_rate_limit(name)]
+        
+    def post_story(self, story, upcoming=(), posted_at=None):
+        """Format a story and queue it (with any thread replies) on its account's outbox.
+        The story counts as posted from here on, at `posted_at` (default now) for the 2-hour
+        window; the outbox retries delivery. `upcoming` are likely next candidates,
+        summarized in the same model call"""
+        account = self.poster.account_for(story)
+        with METRICS.span('format'):
+            # One model call at most: a story the reply left out gets the plain formatter
+            summaries = self.summarizer.summaries([story, *upcoming])
+            posts = self.format_thread(story, summaries.get(content_hash(story)))
+        logger.info(f"Queueing on {account}: {posts[0][:50]}...")
+        
+        # The store re-checks the spacing as it queues, in case another instance just posted
+        if not self.poster.enqueue(account, posts, story.url, story_fingerprint(story), self.post_spacing, posted_at):
+            logger.info(f"Not queued, {account} posted within the last {self.post_spacing / 3600:.1f} hours")
             return False
-            
+        logger.info(f"Queued: {story.title}")
+        return True
+        
     def run_posting_cycle(self):
         """Main posting cycle - finds and posts interesting news"""
+        # Instances sharing the store take turns: only the lease holder picks and posts
+        if not self.coordinator.acquire_posting():
+            logger.info("Another instance holds the posting lease, skipping this cycle")
+            return
+        started_at = time.time()
+        try:
+            with METRICS.span('cycle'):
+                self.posting_cycle(started_at)
+                # Send what this cycle queued, plus anything an earlier run couldn't
+                self.poster.drain()
+        finally:
+            self.coordinator.release_posting()
+            # One-shot runs leave a summary behind for the job to upload
+            METRICS.write_json()
+            
+    def posting_cycle(self, started_at=None):
+        """Find the best new story and post it. Posts count from `started_at`, when the
+        window was checked, so the next run on the same schedule finds it open again"""
         logger.info("Starting posting cycle...")
         
         # Check if we should post now
@@ -421,61 +349,25 @@ class NewsBot:
             logger.info("Not posting due to rate limiting or time restrictions")
             return
         
-        # Get news from both sources
-        crypto_stories = self.get_crypto_news()
-        ai_stories = self.get_ai_news()
-        
-        all_stories = crypto_stories + ai_stories
-        logger.info(f"Found {len(all_stories)} total stories")
-        
-        # Filter for interesting content
-        interesting_stories = self.filter_interesting_stories(all_stories)
-        logger.info(f"Found {len(interesting_stories)} interesting stories")
-        
-        # Remove already posted stories
-        new_stories = [story for story in interesting_stories if story['url'] not in self.posted_stories]
-        logger.info(f"Found {len(new_stories)} new stories")
+        # Stories stream through filter, dedup and ranking as each source returns,
+        # ranked separately for each account free to post
+        best, counts = select_best(self, SOURCES, k=self.summarizer.batch_size,
+                                   group=self.poster.account_for, groups=self.open_accounts())
+        self.breakers.log_summary()
+        logger.info(f"Found {counts['fetched']} total stories")
+        logger.info(f"Found {counts['interesting']} interesting stories")
+        logger.info(f"Found {counts['new']} new stories")
         
-        if not new_stories:
+        if not any(best.values()):
             logger.info("No new interesting stories found")
             return
             
-        # Sort by priority: breaking news first, then by freshness
-        def story_priority(story):
-            title_lower = story['title'].lower()
-            breaking_score = 0
-            
-            if any(word in title_lower for word in ['breaking', 'urgent', 'alert']):
-                breaking_score += 1000
-            if any(word in title_lower for word in ['hack', 'exploit', 'breach']):
-                breaking_score += 800
-            if any(word in title_lower for word in ['surge', 'crash', 'spike']):
-                breaking_score += 600
-            if any(word in title_lower for word in ['record', 'all-time', 'milestone']):
-                breaking_score += 400
-                
-            # Subtract hours old (fresher = higher priority)
-            hours_old = story.get('hours_old', 24)
-            freshness_score = max(0, 24 - hours_old)
-            
-            return breaking_score + freshness_score
-        
-        # Sort stories by priority
-        new_stories.sort(key=story_priority, reverse=True)
-        best_story = new_stories[0]
-        
-        # Format and post
-        formatted_post = self.format_post(best_story)
-        logger.info(f"Attempting to post: {formatted_post[:50]}...")
+        # Breaking news first, then by freshness
+        for stories in best.values():
+            if stories:
+                # The runners-up are summarized alongside, ready for the next cycles
+                self.post_story(stories[0], stories[1:], started_at)
         
-        if self.post_to_twitter(formatted_post):
-            self.posted_stories.add(best_story['url'])
-            self.save_posted_stories()
-            self.last_post_time = time.time()
-            logger.info(f"Successfully posted: {best_story['title']}")
-        else:
-            logger.error("Failed to post story")
-            
     def start_continuous_posting(self):
         """Start continuous posting with intelligent timing"""
         logger.info("Starting continuous news posting...")
@@ -491,6 +383,16 @@ class NewsBot:
                 logger.error(f"Error in posting cycle: {e}")
                 time.sleep(1800)  # Wait 30 minutes on error
 
+def run_daemon(bot):
+    """Run the event-driven daemon until SIGINT/SIGTERM"""
+    import asyncio
+    from daemon import NewsDaemon
+    try:
+        METRICS.serve()
+    except OSError as e:
+        logger.error(f"Metrics endpoint unavailable: {e}")
+    asyncio.run(NewsDaemon(bot, SOURCES).run())
+
 if __name__ == "__main__":
     bot = NewsBot()
     
@@ -498,6 +400,9 @@ if __name__ == "__main__":
     if os.getenv('GITHUB_ACTIONS'):
         logger.info("Running in GitHub Actions mode - single post")
         bot.run_posting_cycle()
-    else:
+    elif os.getenv('BOT_MODE') == 'interval':
         logger.info("Running in continuous mode")
-        bot.start_continuous_posting()
\ No newline at end of file
+        bot.start_continuous_posting()
+    else:
+        logger.info("Running in daemon mode")
+        run_daemon(bot)
\ No newline at end of file
@@ -0,0 +1,150 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+METRICS_PREFIX = 'xbot'
+# One-shot runs write a JSON summary here; daemon mode serves Prometheus text on METRICS_PORT
+METRICS_FILE = os.getenv('METRICS_FILE', 'metrics.json')
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', '9108'))
+
+
+def _label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _label_text(key):
+    if not key:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in key) + '}'
+
+
+class Metrics:
+    """Thread-safe counters and timing spans, exportable as Prometheus text or JSON"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}  # (name, labels) -> value
+        self.timings = {}  # (name, labels) -> [count, total_seconds, max_seconds]
+        self.started_at = time.time()
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.timings.clear()
+            self.started_at = time.time()
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, _label_key(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, seconds, **labels):
+        key = (name, _label_key(labels))
+        with self.lock:
+            timing = self.timings.setdefault(key, [0, 0.0, 0.0])
+            timing[0] += 1
+            timing[1] += seconds
+            timing[2] = max(timing[2], seconds)
+
+    @contextmanager
+    def span(self, name, **labels):
+        """Time a block (recorded even if it raises)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def prometheus_text(self):
+        """Prometheus text exposition format"""
+        lines = []
+        with self.lock:
+            counters = sorted(self.counters.items())
+            timings = sorted(self.timings.items())
+        declared = set()
+        for (name, labels), value in counters:
+            metric = f'{METRICS_PREFIX}_{name}_total'
+            if metric not in declared:
+                # Sorted by name, so each family's samples are contiguous
+                lines.append(f'# TYPE {metric} counter')
+                declared.add(metric)
+            lines.append(f'{metric}{_label_text(labels)} {value}')
+        by_name = {}
+        for (name, labels), timing in timings:
+            by_name.setdefault(name, []).append((labels, timing))
+        for name, series in by_name.items():
+            metric = f'{METRICS_PREFIX}_{name}_seconds'
+            lines.append(f'# TYPE {metric} summary')
+            for labels, (count, total, _) in series:
+                lines.append(f'{metric}_count{_label_text(labels)} {count}')
+                lines.append(f'{metric}_sum{_label_text(labels)} {total:.6f}')
+            # Separate family: Prometheus wants each family's samples contiguous
+            lines.append(f'# TYPE {metric}_max gauge')
+            for labels, (_, _, longest) in series:
+                lines.append(f'{metric}_max{_label_text(labels)} {longest:.6f}')
+        return '\n'.join(lines) + '\n'
+
+    def summary(self):
+        """JSON-friendly snapshot of every counter and span"""
+        with self.lock:
+            counters = sorted(self.counters.items())
+            timings = sorted(self.timings.items())
+        return {
+            'started_at': self.started_at,
+            'generated_at': time.time(),
+            'counters': [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in counters
+            ],
+            'spans': [
+                {'name': name, 'labels': dict(labels), 'count': count, 'total_seconds': round(total, 6),
+                 'avg_seconds': round(total / count, 6), 'max_seconds': round(longest, 6)}
+                for (name, labels), (count, total, longest) in timings
+            ]
+        }
+
+    def write_json(self, path=None):
+        path = path or METRICS_FILE
+        try:
+            with open(path, 'w') as f:
+                json.dump(self.summary(), f, indent=2)
+        except OSError as e:
+            logger.error(f"Failed to write metrics to {path}: {e}")
+
+    def serve(self, host=None, port=None):
+        """Serve /metrics in a background thread"""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host or METRICS_HOST, port or METRICS_PORT), Handler)
+        threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+        logger.info(f"Serving metrics on http://{server.server_address[0]}:{server.server_address[1]}/metrics")
+        return server
+
+
+METRICS = Metrics()
@@ -0,0 +1,155 @@
+"""Streaming selection for one-shot cycles: source -> normalize -> filter -> dedup -> score -> top-k.
+
+Each stage is a generator over per-source batches, so a source's stories move down the
+pipeline as soon as it returns and no stage ever holds the whole cycle's stories. Store
+lookups stay batched per source. Selection stops early, cancelling the slower fetches,
+once the top-k holds only stories that nothing later could reasonably beat."""
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
+
+from dedup import SimhashIndex
+from keywords import PRIORITY_WEIGHTS
+from metrics import METRICS
+from ranking import FRESHNESS_HOURS, TopK, scored_top
+
+logger = logging.getLogger(__name__)
+
+# The whole fetch stage gives up on stragglers after FETCH_CYCLE_DEADLINE seconds
+FETCH_CYCLE_DEADLINE = float(os.getenv('FETCH_CYCLE_DEADLINE', '30'))
+FETCH_MAX_WORKERS = int(os.getenv('FETCH_MAX_WORKERS', '12'))
+# Stop once the top-k is all at least this good: by default a breaking story under two hours old
+STREAM_STOP_SCORE = float(os.getenv('STREAM_STOP_SCORE', PRIORITY_WEIGHTS['breaking'] + FRESHNESS_HOURS - 2))
+
+
+class Stage:
+    """Exclusive time and story counts for one streaming stage, recorded when it finishes"""
+
+    def __init__(self, name, span=None):
+        self.name = name
+        self.span = span or name
+        self.seconds = 0.0
+        self.count_in = 0
+        self.count_out = 0
+
+    def timed(self, work, *args):
+        started = time.perf_counter()
+        try:
+            return work(*args)
+        finally:
+            self.seconds += time.perf_counter() - started
+
+    def record(self):
+        METRICS.observe(self.span, self.seconds)
+        METRICS.inc('stage_stories', self.count_in, stage=self.name, direction='in')
+        METRICS.inc('stage_stories', self.count_out, stage=self.name, direction='out')
+
+
+def fetched(bot, sources, stats=None):
+    """Fetch sources concurrently, yielding each one's stories as it finishes, until the cycle deadline"""
+    stage = Stage('fetch', 'fetch_all')
+    executor = ThreadPoolExecutor(max_workers=FETCH_MAX_WORKERS, thread_name_prefix='fetch')
+    futures = {executor.submit(bot.fetch_source, src): src['name'] for src in sources}
+    pending = as_completed(futures, timeout=FETCH_CYCLE_DEADLINE)
+    try:
+        while True:
+            try:
+                future = stage.timed(next, pending, None)
+            except FuturesTimeout:
+                late = [name for pending_future, name in futures.items() if not pending_future.done()]
+                logger.warning(f"Fetch deadline reached, skipping slow sources: {', '.join(late)}")
+                break
+            if future is None:
+                break
+            try:
+                stories = future.result()
+            except Exception as e:
+                logger.error(f"Error fetching {futures[future]}: {e}")
+                continue
+            stage.count_out += len(stories)
+            yield stories
+    finally:
+        # Don't wait on stragglers (or on sources we no longer need); their own timeout bounds them
+        executor.shutdown(wait=False, cancel_futures=True)
+        bot.feed_cache.save()
+        METRICS.observe(stage.span, stage.seconds)
+        if stats is not None:
+            stats['fetched'] = stage.count_out
+
+
+def normalized(bot, batches):
+    """Ages and cached keyword matches for each batch"""
+    try:
+        for stories in batches:
+            bot.normalize_stories(stories)
+            yield stories
+    finally:
+        batches.close()
+
+
+def interesting(bot, batches, stats=None):
+    """Each batch narrowed to interesting stories (all of them recorded as seen)"""
+    stage = Stage('filter')
+    try:
+        for stories in batches:
+            kept = stage.timed(bot.filter_interesting_stories, stories)
+            bot.store.record_seen(stories)
+            stage.count_in += len(stories)
+            stage.count_out += len(kept)
+            if kept:
+                yield kept
+    finally:
+        batches.close()
+        stage.record()
+        if stats is not None:
+            stats['interesting'] = stage.count_out
+
+
+def novel(bot, batches, index, stats=None):
+    """Each batch without posted stories or near-duplicates of earlier ones"""
+    stage = Stage('dedup')
+    try:
+        for stories in batches:
+            kept = stage.timed(bot.dedupe_stories, stories, index)
+            stage.count_in += len(stories)
+            stage.count_out += len(kept)
+            if kept:
+                yield kept
+    finally:
+        batches.close()
+        stage.record()
+        if stats is not None:
+            stats['new'] = stage.count_out
+
+
+def select_best(bot, sources, k=1, group=None, groups=(None,), stop_score=STREAM_STOP_SCORE):
+    """The k best new stories across `sources`, best first, for each of `groups` (keyed by
+    `group(story)`; stories in other groups are dropped), and the per-stage story counts"""
+    stats = {'fetched': 0, 'interesting': 0, 'new': 0}
+    batches = novel(bot, interesting(bot, normalized(bot, fetched(bot, sources, stats)), stats), SimhashIndex(), stats)
+    tops = {key: TopK(k) for key in groups}
+    stage = Stage('rank')
+    try:
+        for stories in batches:
+            started = time.perf_counter()
+            members = {}
+            for story in stories:
+                key = group(story) if group else None
+                if key in tops:
+                    members.setdefault(key, []).append(story)
+            # Only a batch's own top k can make the running top k; big batches are scored with NumPy
+            for key, candidates in members.items():
+                for score, story in scored_top(candidates, k):
+                    tops[key].push(score, story)
+            stage.seconds += time.perf_counter() - started
+            floors = [top.floor() for top in tops.values()]
+            if floors and all(floor is not None and floor >= stop_score for floor in floors):
+                METRICS.inc('early_stops')
+                logger.info(f"Top stories score {min(floors):.0f}+, not waiting for remaining sources")
+                break
+    finally:
+        # Each stage closes the one before it, down to the fetch stage, which cancels queued fetches
+        batches.close()
+        METRICS.observe(stage.span, stage.seconds)
+    return {key: top.best() for key, top in tops.items()}, stats
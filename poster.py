@@ -0,0 +1,187 @@
+import logging
+import os
+import threading
+import time
+
+from metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+# Posts per window (seconds) each account may make, mirroring X's per-user limit on
+# POST /2/tweets for the API tier in use (Basic: 100/86400, Free: 17/86400)
+POST_RATE_LIMIT = os.getenv('POST_RATE_LIMIT', '100/86400')
+# A failed post is retried after OUTBOX_RETRY_DELAY seconds, up to OUTBOX_MAX_ATTEMPTS times
+OUTBOX_RETRY_DELAY = float(os.getenv('OUTBOX_RETRY_DELAY', '300'))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', '5'))
+# Used when a 429 carries no x-rate-limit-reset header
+RATE_LIMIT_FALLBACK = 900
+
+DEFAULT_ACCOUNT = 'default'
+CREDENTIALS = ('API_KEY', 'API_SECRET', 'ACCESS_TOKEN', 'ACCESS_TOKEN_SECRET', 'BEARER_TOKEN')
+
+
+class TokenBucket:
+    """Local mirror of an endpoint's rate limit, so we stop before X answers 429"""
+
+    def __init__(self, capacity, window):
+        self.capacity = capacity
+        self.rate = capacity / window
+        self.tokens = float(capacity)
+        self.updated = time.time()
+        self.paused_until = 0.0
+
+    def take(self, now=None):
+        """Spend one token if one is available"""
+        now = time.time() if now is None else now
+        if self.paused_until:
+            if now < self.paused_until:
+                return False
+            # X's window has reset
+            self.tokens = float(self.capacity)
+            self.updated = now
+            self.paused_until = 0.0
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def pause_until(self, until):
+        """Stop until X's own window resets, then start again full"""
+        self.tokens = 0.0
+        self.paused_until = until
+
+
+class Account:
+    def __init__(self, name, prefix):
+        self.name = name
+        self.prefix = prefix
+        self._client = None
+        capacity, window = POST_RATE_LIMIT.split('/')
+        self.bucket = TokenBucket(int(capacity), float(window))
+
+    @property
+    def client(self):
+        # Built on first post, so runs that post nothing never import tweepy
+        if self._client is None:
+            self._client = twitter_client(self.prefix)
+        return self._client
+
+
+def twitter_client(prefix='TWITTER_'):
+    """Client for the credentials under `prefix`; app keys fall back to the default account's.
+    Rate limits are handled by the outbox, so the client never sleeps on a 429"""
+    import tweepy
+    keys = {name: os.getenv(prefix + name) or os.getenv('TWITTER_' + name) for name in CREDENTIALS}
+    return tweepy.Client(
+        consumer_key=keys['API_KEY'],
+        consumer_secret=keys['API_SECRET'],
+        access_token=keys['ACCESS_TOKEN'],
+        access_token_secret=keys['ACCESS_TOKEN_SECRET'],
+        bearer_token=keys['BEARER_TOKEN'],
+        wait_on_rate_limit=False
+    )
+
+
+def load_accounts(types):
+    """The default account, plus one per story type that has its own TWITTER_<TYPE>_ACCESS_TOKEN
+    (e.g. TWITTER_AI_ACCESS_TOKEN); that account then posts every story of the type"""
+    accounts = {DEFAULT_ACCOUNT: Account(DEFAULT_ACCOUNT, 'TWITTER_')}
+    for type in sorted(types):
+        prefix = f'TWITTER_{type.upper()}_'
+        if os.getenv(prefix + 'ACCESS_TOKEN'):
+            accounts[type] = Account(type, prefix)
+    return accounts
+
+
+def rate_limit_reset(error):
+    """When X says the window resets (epoch seconds), from a 429 response"""
+    try:
+        return float(error.response.headers['x-rate-limit-reset'])
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return time.time() + RATE_LIMIT_FALLBACK
+
+
+class Poster:
+    """Persistent outbox of formatted posts, sent per account within each account's rate limit.
+    drain never waits: anything that can't go out now stays queued for the next call"""
+
+    def __init__(self, store, accounts):
+        self.store = store
+        self.accounts = accounts
+        self.lock = threading.Lock()
+
+    def account_for(self, story):
+        """Account that posts `story`: its type's own account if configured, else the default"""
+        return story.type if story.type in self.accounts else DEFAULT_ACCOUNT
+
+    def enqueue(self, account, posts, url=None, fingerprint=None, spacing=None, posted_at=None):
+        """Queue a post, followed by any thread replies. False if `account` already posted
+        (from any instance) within `spacing` seconds of `posted_at` (default now)"""
+        if not self.store.enqueue_posts(account, posts, url, fingerprint, spacing, posted_at):
+            METRICS.inc('outbox', len(posts), result='too_soon', account=account)
+            return False
+        METRICS.inc('outbox', len(posts), result='queued', account=account)
+        return True
+
+    def drain(self):
+        """Send every due post the rate limits allow. Returns how many were sent"""
+        if not self.lock.acquire(blocking=False):
+            return 0  # Another thread is already draining
+        try:
+            sent = 0
+            blocked = set()
+            while True:
+                # A thread's replies become due as their parents go out, so go round again
+                progress = 0
+                for post_id, account_name, content, reply_to in self.store.due_posts():
+                    account = self.accounts.get(account_name) or self.accounts[DEFAULT_ACCOUNT]
+                    if account.name in blocked or not account.bucket.take():
+                        blocked.add(account.name)
+                        continue
+                    if self.send(post_id, account, content, reply_to):
+                        progress += 1
+                    else:
+                        blocked.add(account.name)
+                sent += progress
+                if not progress:
+                    return sent
+        finally:
+            self.lock.release()
+
+    def send(self, post_id, account, content, reply_to):
+        """Post one outbox entry. Returns False if the account should stop for now"""
+        try:
+            client = account.client
+        except Exception as e:
+            # Counts as an attempt, so a post that can never be sent is eventually abandoned
+            # instead of blocking its account on every drain
+            self.retry(post_id, account, f"Failed to initialize Twitter client for {account.name}", e)
+            return False
+        from tweepy.errors import TooManyRequests
+        try:
+            with METRICS.span('post'):
+                response = client.create_tweet(text=content, in_reply_to_tweet_id=reply_to)
+        except TooManyRequests as e:
+            reset = rate_limit_reset(e)
+            account.bucket.pause_until(reset)
+            self.store.defer_account(account.name, reset)
+            METRICS.inc('posts', result='rate_limited', account=account.name)
+            logger.warning(f"Rate limited on {account.name}, holding its posts for {reset - time.time():.0f}s")
+            return False
+        except Exception as e:
+            self.retry(post_id, account, f"Failed to post tweet on {account.name}", e)
+            return False
+        self.store.mark_sent(post_id, response.data['id'])
+        METRICS.inc('posts', result='ok', account=account.name)
+        logger.info(f"Successfully posted tweet on {account.name}: {response.data['id']}")
+        return True
+
+    def retry(self, post_id, account, message, error):
+        """Schedule a failed post for another attempt, or abandon it after OUTBOX_MAX_ATTEMPTS"""
+        METRICS.inc('posts', result='error', account=account.name)
+        if self.store.mark_retry(post_id, time.time() + OUTBOX_RETRY_DELAY, OUTBOX_MAX_ATTEMPTS):
+            logger.error(f"{message}, will retry: {error}")
+        else:
+            logger.error(f"Giving up on post {post_id} after {OUTBOX_MAX_ATTEMPTS} attempts: {error}")
@@ -0,0 +1,128 @@
+import heapq
+import os
+import time
+from operator import itemgetter
+
+from keywords import PRIORITY_WEIGHTS, keyword_score, match_story
+from sources import SOURCES
+
+# Below this many candidates plain Python beats NumPy's setup cost
+RANK_VECTORIZE_MIN = int(os.getenv('RANK_VECTORIZE_MIN', '512'))
+FRESHNESS_HOURS = 24
+
+RANK_CATEGORIES = tuple(PRIORITY_WEIGHTS)
+CATEGORY_BITS = {category: 1 << i for i, category in enumerate(RANK_CATEGORIES)}
+REPUTATION = {src['name']: src['reputation'] for src in SOURCES}
+
+_masks = {}
+_np = None
+
+
+def _numpy():
+    # Imported on first large batch so one-shot runs never pay for it. Optional:
+    # the slim install leaves it out and ranks with the heap instead
+    global _np
+    if _np is None:
+        try:
+            import numpy
+            _np = numpy
+        except ImportError:
+            _np = False
+    return _np or None
+
+
+def category_mask(hits):
+    """Bitmask of the ranking categories in a (frozen) set of keyword hits"""
+    mask = _masks.get(hits)
+    if mask is None:
+        mask = 0
+        for category in hits:
+            mask |= CATEGORY_BITS.get(category, 0)
+        _masks[hits] = mask
+    return mask
+
+
+def static_score(story):
+    """The part of story_score that doesn't change with age: keyword weight plus reputation"""
+    return keyword_score(match_story(story)['title']) + REPUTATION.get(story.source, 0)
+
+
+def story_score(story):
+    """Ranking score: breaking-news keywords first, then freshness, then source reputation"""
+    freshness = 0 if story.hours_old is None else max(0, FRESHNESS_HOURS - story.hours_old)
+    return static_score(story) + freshness
+
+
+class CandidateBatch:
+    """Struct-of-arrays view of a candidate list: features are extracted once, after which
+    scoring and top-k selection are pure NumPy"""
+
+    def __init__(self, stories):
+        np = _numpy()
+        self.stories = stories
+        masks, published, reputation = [], [], []
+        for story in stories:
+            masks.append(category_mask(match_story(story)['title']))
+            published.append(np.nan if story.published is None else story.published)
+            reputation.append(REPUTATION.get(story.source, 0))
+        weights = np.array([PRIORITY_WEIGHTS[category] for category in RANK_CATEGORIES], dtype=np.float64)
+        flags = (np.array(masks, dtype=np.int64)[:, None] >> np.arange(len(RANK_CATEGORIES))) & 1
+        # Keyword weight and reputation never change, so fold them into one static score
+        self.static_scores = flags @ weights + np.array(reputation, dtype=np.float64)
+        self.published = np.array(published, dtype=np.float64)
+
+    def scores(self, now):
+        """story_score for every candidate, with ages taken against `now` (epoch seconds)"""
+        np = _numpy()
+        hours_old = (now - self.published) / 3600
+        # Undated candidates (NaN) get no freshness bonus
+        freshness = np.nan_to_num(np.maximum(FRESHNESS_HOURS - hours_old, 0), nan=0.0)
+        return self.static_scores + freshness
+
+    def top(self, k, now):
+        """Indices of the k best candidates, best first"""
+        np = _numpy()
+        scores = self.scores(now)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top], kind='stable')]
+
+
+def scored_top(stories, k=1, now=None):
+    """(score, story) for the k best stories, best first, by partial selection rather than
+    a full sort; vectorized once the batch is big enough to pay for NumPy"""
+    if k <= 0 or not stories:
+        return []
+    if len(stories) < RANK_VECTORIZE_MIN or _numpy() is None:
+        return heapq.nlargest(k, ((story_score(story), story) for story in stories), key=itemgetter(0))
+
+    batch = CandidateBatch(stories)
+    now = time.time() if now is None else now
+    scores = batch.scores(now)
+    return [(float(scores[i]), stories[i]) for i in batch.top(k, now)]
+
+
+class TopK:
+    """Bounded min-heap keeping the k best (score, story) pairs seen so far"""
+
+    def __init__(self, k):
+        self.k = k
+        self.heap = []  # (score, seq, story), worst on top
+        self.seq = 0
+
+    def push(self, score, story):
+        # seq breaks score ties in favour of the earlier story, like the stable sort does
+        self.seq -= 1
+        item = (score, self.seq, story)
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, item)
+        elif item > self.heap[0]:
+            heapq.heapreplace(self.heap, item)
+
+    def floor(self):
+        """Lowest score still in the top k, or None until k stories have been pushed"""
+        return self.heap[0][0] if len(self.heap) == self.k else None
+
+    def best(self):
+        """The kept stories, best first"""
+        return [story for _, _, story in sorted(self.heap, reverse=True)]
@@ -0,0 +1,108 @@
+import calendar
+import time
+
+from story import Story
+
+
+def source(name, url, kind, type, limit=10, max_age_hours=24, timeout=None, interval=900, reputation=0, parse=None):
+    """Declare a news source. `parse` maps a JSON payload to stories; RSS sources use rss_story per entry.
+    `interval` is how often (seconds) daemon mode polls it; `reputation` is a small ranking bonus
+    that breaks ties between similarly fresh stories"""
+    return {
+        'name': name,
+        'url': url,
+        'kind': kind,
+        'type': type,
+        'limit': limit,
+        'max_age_hours': max_age_hours,
+        'timeout': timeout,
+        'interval': interval,
+        'reputation': reputation,
+        'parse': parse or (rss_story if kind == 'rss' else None)
+    }
+
+
+def rss_story(entry, src, now):
+    """Map a cached feed entry to a Story, or None if it's older than the source allows"""
+    published = None
+    # Undated entries carry no age rather than the previous entry's
+    if entry['published_parsed']:
+        # feedparser normalizes dates to UTC
+        published = calendar.timegm(entry['published_parsed'])
+        if now - published > src['max_age_hours'] * 3600:
+            return None
+    return Story(entry['title'], entry['summary'][:300], entry['link'], src['type'], src['name'], published)
+
+
+def parse_coingecko(data, src):
+    """CoinGecko trending coins"""
+    stories = []
+    for coin in data['coins'][:src['limit']]:
+        stories.append(Story(
+            f"{coin['item']['name']} ({coin['item']['symbol']}) trending on CoinGecko",
+            f"Market cap rank: #{coin['item']['market_cap_rank']}",
+            f"https://www.coingecko.com/en/coins/{coin['item']['id']}",
+            src['type'], src['name']
+        ))
+    return stories
+
+
+def parse_whale_alert(data, src):
+    """$10M+ bitcoin/ethereum transactions"""
+    stories = []
+    for tx in data.get('transactions', [])[:src['limit']]:
+        if tx.get('blockchain') in ['bitcoin', 'ethereum']:
+            amount = tx.get('amount', 0)
+            if amount > 10000000:  # $10M+ transactions
+                stories.append(Story(
+                    f"Whale Alert: {amount/1000000:.1f}M {tx.get('symbol', 'crypto').upper()} moved",
+                    f"Large transaction detected on {tx.get('blockchain')} blockchain",
+                    f"https://whale-alert.io/transaction/{tx.get('hash', '')}",
+                    src['type'], src['name'], published=int(time.time())
+                ))
+    return stories
+
+
+def parse_defipulse(data, src):
+    """Protocols with a 20%+ daily TVL change"""
+    stories = []
+    for protocol in data[:src['limit']]:
+        if protocol.get('change_1d', 0) > 20:  # 20%+ daily change
+            stories.append(Story(
+                f"{protocol.get('name')} TVL {protocol.get('change_1d', 0):.1f}% in 24h",
+                f"Total Value Locked: ${protocol.get('value', 0)/1000000:.1f}M",
+                f"https://defipulse.com/{protocol.get('slug', '')}",
+                src['type'], src['name'], published=int(time.time())
+            ))
+    return stories
+
+
+def parse_compound(data, src):
+    """Active Compound governance proposals"""
+    stories = []
+    for proposal in data.get('proposals', [])[:src['limit']]:
+        if proposal.get('state') == 'Active':
+            stories.append(Story(
+                f"Compound Governance: {proposal.get('title', 'New proposal')}",
+                f"Proposal #{proposal.get('id')} is live for voting",
+                f"https://compound.finance/governance/proposals/{proposal.get('id')}",
+                src['type'], src['name'], published=int(time.time())
+            ))
+    return stories
+
+
+SOURCES = [
+    # Crypto
+    source('CoinGecko', 'https://api.coingecko.com/api/v3/search/trending', 'json', 'crypto', limit=3, interval=300, parse=parse_coingecko),
+    source('CoinDesk', 'https://www.coindesk.com/arc/outboundfeeds/rss/', 'rss', 'crypto', limit=20, interval=600, reputation=3),
+    source('Cointelegraph', 'https://cointelegraph.com/rss', 'rss', 'crypto', limit=15, interval=600, reputation=2),
+    source('CryptoSlate', 'https://cryptoslate.com/feed/', 'rss', 'crypto', limit=10, reputation=1),
+    # On-chain data
+    source('Whale Alert', 'https://api.whale-alert.io/v1/transactions?api_key=demo&min_value=1000000', 'json', 'crypto', limit=3, interval=60, reputation=2, parse=parse_whale_alert),
+    source('DeFiPulse', 'https://api.defipulse.com/v1/defi', 'json', 'crypto', limit=3, parse=parse_defipulse),
+    source('Compound', 'https://api.compound.finance/api/v2/governance/proposals', 'json', 'crypto', limit=2, parse=parse_compound),
+    # AI
+    source('VentureBeat', 'https://venturebeat.com/category/ai/feed/', 'rss', 'ai', limit=10, reputation=2),
+    source('TechCrunch', 'https://techcrunch.com/category/artificial-intelligence/feed/', 'rss', 'ai', limit=10, reputation=3),
+    source('AI News', 'https://www.artificialintelligence-news.com/feed/', 'rss', 'ai', limit=10, reputation=1),
+]
@@ -0,0 +1,514 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from dedup import (BANDS, DEDUP_MAX_DISTANCE, FINGERPRINT_VERSION, SimhashIndex, band_probes, bands, canonical_url,
+                   hamming)
+
+logger = logging.getLogger(__name__)
+
+# How long posted URLs and seen candidates are remembered
+POSTED_TTL_DAYS = float(os.getenv('POSTED_TTL_DAYS', '30'))
+SEEN_TTL_HOURS = float(os.getenv('SEEN_TTL_HOURS', '48'))
+
+# How long sent and abandoned posts stay in the outbox
+OUTBOX_TTL_DAYS = float(os.getenv('OUTBOX_TTL_DAYS', '7'))
+
+# How long model-written summaries are kept
+SUMMARY_TTL_DAYS = float(os.getenv('SUMMARY_TTL_DAYS', '7'))
+
+# WAL (the default) needs every process on the same host; DELETE falls back to plain
+# file locking, for a store on a network volume shared between hosts
+STORE_JOURNAL_MODE = os.getenv('STORE_JOURNAL_MODE', 'WAL')
+# How long a write waits for another process's lock before failing
+STORE_BUSY_TIMEOUT = float(os.getenv('STORE_BUSY_TIMEOUT', '10'))
+# Candidates kept in the shared pool, and how old they may get
+CANDIDATE_MAX_COUNT = int(os.getenv('DAEMON_MAX_CANDIDATES', '5000'))
+CANDIDATE_MAX_AGE_HOURS = 24
+
+# Stay well under SQLite's bound-parameter limit in IN (...) queries
+QUERY_CHUNK = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posted (
+    url TEXT PRIMARY KEY,
+    posted_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS posted_at_idx ON posted (posted_at);
+CREATE TABLE IF NOT EXISTS seen (
+    url TEXT PRIMARY KEY,
+    first_seen INTEGER NOT NULL,
+    last_seen INTEGER NOT NULL,
+    title_hits TEXT NOT NULL,
+    all_hits TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS seen_last_seen_idx ON seen (last_seen);
+CREATE TABLE IF NOT EXISTS source_health (
+    name TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    failures INTEGER NOT NULL,
+    opened_at REAL NOT NULL,
+    cooldown REAL NOT NULL,
+    success_rate REAL NOT NULL,
+    latency REAL NOT NULL,
+    last_error TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS posted_fingerprints (
+    url TEXT PRIMARY KEY,
+    simhash INTEGER NOT NULL,
+    {band_columns}
+);
+{band_indexes}
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    account TEXT NOT NULL,
+    content TEXT NOT NULL,
+    parent_id INTEGER,
+    tweet_id TEXT,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    not_before REAL NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS outbox_due_idx ON outbox (status, not_before);
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    holder TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS workers (
+    worker_id TEXT PRIMARY KEY,
+    heartbeat REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS post_times (
+    account TEXT PRIMARY KEY,
+    posted_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS candidates (
+    url TEXT PRIMARY KEY,
+    account TEXT NOT NULL,
+    base_score REAL NOT NULL,
+    title TEXT NOT NULL,
+    content TEXT NOT NULL,
+    type TEXT NOT NULL,
+    source TEXT NOT NULL,
+    published INTEGER,
+    simhash INTEGER NOT NULL,
+    queued_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS candidates_account_idx ON candidates (account);
+CREATE TABLE IF NOT EXISTS summaries (
+    content_hash TEXT PRIMARY KEY,
+    text TEXT NOT NULL,
+    created_at INTEGER NOT NULL
+);
+""".format(
+    band_columns=',\n    '.join(f'band{i} INTEGER NOT NULL' for i in range(BANDS)),
+    band_indexes='\n'.join(f'CREATE INDEX IF NOT EXISTS fingerprint_band{i}_idx ON posted_fingerprints (band{i});' for i in range(BANDS))
+)
+
+
+HEALTH_COLUMNS = ('state', 'failures', 'opened_at', 'cooldown', 'success_rate', 'latency', 'last_error')
+
+
+def _signed(fingerprint):
+    # SQLite integers are signed 64-bit
+    return fingerprint - (1 << 64) if fingerprint >= 1 << 63 else fingerprint
+
+
+def _chunks(items, size=QUERY_CHUNK):
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class StoryStore:
+    """SQLite (WAL) store of posted URLs and candidates seen in earlier cycles"""
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv('STORE_PATH', 'newsbot.db')
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None,
+                                    timeout=STORE_BUSY_TIMEOUT)
+        self.conn.execute(f'PRAGMA journal_mode={STORE_JOURNAL_MODE}')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        # Posted fingerprints in memory, and the last posted_fingerprints rowid loaded into it
+        self._posted_index = None
+        self._posted_rowid = 0
+        rebanded = self._drop_stale_fingerprints()
+        self.conn.executescript(SCHEMA)
+        if rebanded:
+            with self.conn:
+                self.conn.execute('BEGIN')
+                for url, simhash in rebanded:
+                    self._insert_fingerprint(url, simhash & ((1 << 64) - 1))
+
+    def _drop_stale_fingerprints(self):
+        """Clear fingerprints computed by another version of story_features, and drop the
+        fingerprint table if its band layout is out of date. Returns the (url, simhash)
+        rows to re-insert under the current layout"""
+        version, = self.conn.execute('PRAGMA user_version').fetchone()
+        columns = [row[1] for row in self.conn.execute('PRAGMA table_info(posted_fingerprints)')]
+        if version != FINGERPRINT_VERSION:
+            if columns:
+                self.conn.execute('DELETE FROM posted_fingerprints')
+                logger.info("Fingerprint features changed, dropped stored fingerprints")
+            if self.conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'candidates'").fetchone():
+                self.conn.execute('DELETE FROM candidates')
+            self.conn.execute(f'PRAGMA user_version = {FINGERPRINT_VERSION}')
+        if not columns or sum(column.startswith('band') for column in columns) == BANDS:
+            return []
+        rows = self.conn.execute('SELECT url, simhash FROM posted_fingerprints').fetchall()
+        self.conn.execute('DROP TABLE posted_fingerprints')
+        logger.info(f"Re-banding {len(rows)} posted fingerprints into {BANDS} bands")
+        return rows
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def is_posted(self, url):
+        with self.lock:
+            row = self.conn.execute('SELECT 1 FROM posted WHERE url = ?', (url,)).fetchone()
+        return row is not None
+
+    def posted_among(self, urls):
+        """Subset of `urls` that have already been posted"""
+        posted = set()
+        with self.lock:
+            for chunk in _chunks(set(urls)):
+                placeholders = ','.join('?' * len(chunk))
+                rows = self.conn.execute(f'SELECT url FROM posted WHERE url IN ({placeholders})', chunk)
+                posted.update(url for url, in rows)
+        return posted
+
+    def mark_posted(self, url, fingerprint=None, posted_at=None):
+        """Record one posted URL and, if given, its SimHash fingerprint"""
+        with self.lock, self.conn:
+            self.conn.execute('BEGIN')
+            self._insert_posted(url, fingerprint, posted_at or time.time())
+
+    def _insert_posted(self, url, fingerprint, posted_at):
+        # Caller holds the lock and an open transaction
+        self.conn.execute('INSERT OR REPLACE INTO posted (url, posted_at) VALUES (?, ?)', (url, int(posted_at)))
+        if fingerprint is not None:
+            self._insert_fingerprint(url, fingerprint)
+
+    def _insert_fingerprint(self, url, fingerprint):
+        band_columns = ', '.join(f'band{i}' for i in range(BANDS))
+        self.conn.execute(
+            f'INSERT OR REPLACE INTO posted_fingerprints (url, simhash, {band_columns}) '
+            f'VALUES ({", ".join("?" * (BANDS + 2))})',
+            (url, _signed(fingerprint), *bands(fingerprint))
+        )
+
+    def near_posted(self, fingerprint, max_distance=DEDUP_MAX_DISTANCE):
+        """True if a posted story's fingerprint is within max_distance bits (indexed lookup
+        of each band and its one-bit neighbours)"""
+        probes = band_probes(fingerprint)
+        where = ' OR '.join(f'band{i} IN ({", ".join("?" * len(values))})' for i, values in enumerate(probes))
+        with self.lock:
+            rows = self.conn.execute(
+                f'SELECT simhash FROM posted_fingerprints WHERE {where}', [value for values in probes for value in values]
+            ).fetchall()
+        return any(hamming(simhash & ((1 << 64) - 1), fingerprint) <= max_distance for simhash, in rows)
+
+    def posted_index(self):
+        """In-memory index of every posted fingerprint, for checking a whole batch of stories
+        without a query per story. Loaded once, then topped up with the rows written since
+        (by this or another process), so each call reads only new fingerprints"""
+        with self.lock:
+            if self._posted_index is None:
+                self._posted_index, self._posted_rowid = SimhashIndex(), 0
+            rows = self.conn.execute(
+                'SELECT rowid, simhash FROM posted_fingerprints WHERE rowid > ? ORDER BY rowid', (self._posted_rowid,)
+            ).fetchall()
+            for _, simhash in rows:
+                self._posted_index.add(simhash & ((1 << 64) - 1))
+            if rows:
+                self._posted_rowid = rows[-1][0]
+            return self._posted_index
+
+    def import_posted(self, urls):
+        """Bulk-load legacy posted URLs (POSTED_STORIES / posted_stories.json), keeping existing timestamps"""
+        now = int(time.time())
+        with self.lock, self.conn:
+            self.conn.execute('BEGIN')
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO posted (url, posted_at) VALUES (?, ?)',
+                ((canonical_url(url), now) for url in urls if url)
+            )
+
+    def known_matches(self, urls):
+        """Cached keyword matches for candidates seen in earlier cycles, by URL"""
+        known = {}
+        with self.lock:
+            for chunk in _chunks(set(urls)):
+                placeholders = ','.join('?' * len(chunk))
+                rows = self.conn.execute(
+                    f'SELECT url, title_hits, all_hits FROM seen WHERE url IN ({placeholders})', chunk
+                )
+                for url, title_hits, all_hits in rows:
+                    known[url] = {
+                        'title': frozenset(filter(None, title_hits.split(','))),
+                        'all': frozenset(filter(None, all_hits.split(',')))
+                    }
+        return known
+
+    def record_seen(self, stories):
+        """Remember this cycle's candidates and their keyword matches"""
+        now = int(time.time())
+        rows = [
+            (story.url, now, now, ','.join(sorted(story.matches['title'])), ','.join(sorted(story.matches['all'])))
+            for story in stories if story.matches is not None
+        ]
+        with self.lock, self.conn:
+            self.conn.execute('BEGIN')
+            self.conn.executemany(
+                'INSERT INTO seen (url, first_seen, last_seen, title_hits, all_hits) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT(url) DO UPDATE SET last_seen = excluded.last_seen',
+                rows
+            )
+
+    def source_health(self):
+        """Circuit breaker state and health stats for every source, by name"""
+        with self.lock:
+            rows = self.conn.execute(
+                f'SELECT name, {", ".join(HEALTH_COLUMNS)} FROM source_health'
+            ).fetchall()
+        return {row[0]: dict(zip(HEALTH_COLUMNS, row[1:])) for row in rows}
+
+    def save_source_health(self, name, health):
+        """Upsert one source's breaker state"""
+        with self.lock:
+            self.conn.execute(
+                f'INSERT OR REPLACE INTO source_health (name, {", ".join(HEALTH_COLUMNS)}) '
+                f'VALUES ({", ".join("?" * (len(HEALTH_COLUMNS) + 1))})',
+                (name, *(health[column] for column in HEALTH_COLUMNS))
+            )
+
+    def enqueue_posts(self, account, posts, url=None, fingerprint=None, spacing=None, posted_at=None):
+        """Queue a post and its thread replies (each replying to the one before) for `account`,
+        claiming `url` as posted so later cycles don't pick the story again. The account's post
+        time is recorded as `posted_at` (default now). With `spacing`, nothing is queued
+        (returns False) if that is less than `spacing` seconds after the account's last post"""
+        now = time.time()
+        posted_at = now if posted_at is None else posted_at
+        with self.lock, self.conn:
+            # IMMEDIATE: take the write lock before reading post_times, so two processes can't both pass
+            self.conn.execute('BEGIN IMMEDIATE')
+            if spacing is not None:
+                row = self.conn.execute('SELECT posted_at FROM post_times WHERE account = ?', (account,)).fetchone()
+                if row and posted_at - row[0] < spacing:
+                    return False
+            parent_id = None
+            for content in posts:
+                parent_id = self.conn.execute(
+                    'INSERT INTO outbox (account, content, parent_id, status, attempts, not_before, created_at) '
+                    "VALUES (?, ?, ?, 'queued', 0, ?, ?)",
+                    (account, content, parent_id, now, now)
+                ).lastrowid
+            self.conn.execute('INSERT OR REPLACE INTO post_times (account, posted_at) VALUES (?, ?)', (account, posted_at))
+            if url:
+                self._insert_posted(url, fingerprint, now)
+                self.conn.execute('DELETE FROM candidates WHERE url = ?', (url,))
+        return True
+
+    def last_post_time(self, account):
+        """When any process last queued a post for `account`, or None"""
+        with self.lock:
+            row = self.conn.execute('SELECT posted_at FROM post_times WHERE account = ?', (account,)).fetchone()
+        return row[0] if row else None
+
+    def due_posts(self, now=None):
+        """Queued posts ready to send, oldest first, as (id, account, content, reply_to_tweet_id).
+        Replies only become due once their parent has been sent"""
+        now = time.time() if now is None else now
+        with self.lock:
+            return self.conn.execute(
+                'SELECT o.id, o.account, o.content, p.tweet_id FROM outbox o '
+                'LEFT JOIN outbox p ON p.id = o.parent_id '
+                "WHERE o.status = 'queued' AND o.not_before <= ? "
+                "AND (o.parent_id IS NULL OR p.status = 'sent') ORDER BY o.id",
+                (now,)
+            ).fetchall()
+
+    def next_post_due(self):
+        """Earliest not_before of any queued post, or None when the outbox is empty"""
+        with self.lock:
+            row = self.conn.execute("SELECT MIN(not_before) FROM outbox WHERE status = 'queued'").fetchone()
+        return row[0]
+
+    def mark_sent(self, post_id, tweet_id):
+        with self.lock:
+            self.conn.execute("UPDATE outbox SET status = 'sent', tweet_id = ? WHERE id = ?", (str(tweet_id), post_id))
+
+    def mark_retry(self, post_id, not_before, max_attempts):
+        """Push a post back to `not_before`, abandoning it (and its replies) after max_attempts.
+        Returns False if it was abandoned"""
+        with self.lock, self.conn:
+            self.conn.execute('BEGIN')
+            self.conn.execute(
+                'UPDATE outbox SET attempts = attempts + 1, not_before = ? WHERE id = ?', (not_before, post_id)
+            )
+            attempts, = self.conn.execute('SELECT attempts FROM outbox WHERE id = ?', (post_id,)).fetchone()
+            if attempts < max_attempts:
+                return True
+            self.conn.execute(
+                "WITH RECURSIVE thread(id) AS (SELECT ? UNION ALL "
+                "SELECT outbox.id FROM outbox JOIN thread ON outbox.parent_id = thread.id) "
+                "UPDATE outbox SET status = 'failed' WHERE id IN thread",
+                (post_id,)
+            )
+            return False
+
+    def defer_account(self, account, not_before):
+        """Hold every queued post for `account` until `not_before` (after a rate-limit response)"""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE outbox SET not_before = MAX(not_before, ?) WHERE account = ? AND status = 'queued'",
+                (not_before, account)
+            )
+
+    def acquire_lease(self, name, holder, ttl):
+        """Take or renew the named lease for `ttl` seconds. True if `holder` now has it"""
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.execute('BEGIN IMMEDIATE')
+            self.conn.execute(
+                'INSERT INTO leases (name, holder, expires_at) VALUES (?, ?, ?) '
+                'ON CONFLICT(name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at '
+                'WHERE leases.holder = excluded.holder OR leases.expires_at < ?',
+                (name, holder, now + ttl, now)
+            )
+            current, = self.conn.execute('SELECT holder FROM leases WHERE name = ?', (name,)).fetchone()
+        return current == holder
+
+    def release_lease(self, name, holder):
+        with self.lock:
+            self.conn.execute('DELETE FROM leases WHERE name = ? AND holder = ?', (name, holder))
+
+    def heartbeat(self, worker_id, now=None):
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO workers (worker_id, heartbeat) VALUES (?, ?)',
+                (worker_id, time.time() if now is None else now)
+            )
+
+    def live_workers(self, since):
+        """Ids of workers with a heartbeat after `since`, sorted"""
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT worker_id FROM workers WHERE heartbeat >= ? ORDER BY worker_id', (since,)
+            ).fetchall()
+        return [worker_id for worker_id, in rows]
+
+    def remove_worker(self, worker_id):
+        with self.lock:
+            self.conn.execute('DELETE FROM workers WHERE worker_id = ?', (worker_id,))
+
+    def offer_candidates(self, candidates):
+        """Add (story, account, base_score) candidates to the pool every worker shares, keeping
+        the first offer of each URL. Returns how many were new"""
+        rows = [
+            (story.url, account, base_score, story.title, story.content, story.type, story.source,
+             story.published, _signed(story.simhash), story.queued_at)
+            for story, account, base_score in candidates
+        ]
+        with self.lock, self.conn:
+            self.conn.execute('BEGIN IMMEDIATE')
+            before = self.conn.total_changes
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO candidates (url, account, base_score, title, content, type, source, '
+                'published, simhash, queued_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                rows
+            )
+            added = self.conn.total_changes - before
+            count, = self.conn.execute('SELECT COUNT(*) FROM candidates').fetchone()
+            if count > CANDIDATE_MAX_COUNT:
+                self.conn.execute(
+                    'DELETE FROM candidates WHERE url IN '
+                    '(SELECT url FROM candidates ORDER BY base_score, queued_at LIMIT ?)',
+                    (count - CANDIDATE_MAX_COUNT,)
+                )
+        return added
+
+    def best_candidates(self, account, freshness_hours, limit=1, now=None):
+        """Live (unexpired, unposted) candidates for `account`, best first, as
+        (url, title, content, type, source, published, simhash, queued_at) rows. The score is
+        ranking.story_score: base score plus freshness"""
+        now = time.time() if now is None else now
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT url, title, content, type, source, published, simhash, queued_at FROM candidates c '
+                'WHERE account = ? AND COALESCE(published, queued_at) >= ? '
+                'AND NOT EXISTS (SELECT 1 FROM posted p WHERE p.url = c.url) '
+                'ORDER BY base_score + CASE WHEN published IS NULL THEN 0 '
+                'ELSE MAX(0, ? - (? - published) / 3600.0) END DESC, queued_at LIMIT ?',
+                (account, now - CANDIDATE_MAX_AGE_HOURS * 3600, freshness_hours, now, limit)
+            ).fetchall()
+        return [row[:6] + (row[6] & ((1 << 64) - 1), row[7]) for row in rows]
+
+    def candidate_fingerprints(self):
+        """SimHash of every pooled candidate"""
+        with self.lock:
+            rows = self.conn.execute('SELECT simhash FROM candidates').fetchall()
+        return [simhash & ((1 << 64) - 1) for simhash, in rows]
+
+    def drop_candidate(self, url):
+        with self.lock:
+            self.conn.execute('DELETE FROM candidates WHERE url = ?', (url,))
+
+    def cached_summaries(self, content_hashes):
+        """Summaries already written for any of `content_hashes`, by hash"""
+        summaries = {}
+        with self.lock:
+            for chunk in _chunks(set(content_hashes)):
+                placeholders = ','.join('?' * len(chunk))
+                rows = self.conn.execute(
+                    f'SELECT content_hash, text FROM summaries WHERE content_hash IN ({placeholders})', chunk
+                )
+                summaries.update(rows)
+        return summaries
+
+    def save_summaries(self, summaries):
+        """Cache model-written summaries, keyed by content hash"""
+        now = int(time.time())
+        with self.lock, self.conn:
+            self.conn.execute('BEGIN')
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO summaries (content_hash, text, created_at) VALUES (?, ?, ?)',
+                [(content_hash, text, now) for content_hash, text in summaries.items()]
+            )
+
+    def prune(self):
+        """Drop posted URLs and seen candidates past their TTL"""
+        now = time.time()
+        with self.lock:
+            posted = self.conn.execute(
+                'DELETE FROM posted WHERE posted_at < ?', (int(now - POSTED_TTL_DAYS * 86400),)
+            ).rowcount
+            seen = self.conn.execute(
+                'DELETE FROM seen WHERE last_seen < ?', (int(now - SEEN_TTL_HOURS * 3600),)
+            ).rowcount
+            expired = self.conn.execute(
+                'DELETE FROM posted_fingerprints WHERE url NOT IN (SELECT url FROM posted)'
+            ).rowcount
+            if expired:
+                # Rebuilt on the next posted_index call
+                self._posted_index = None
+            self.conn.execute(
+                "DELETE FROM outbox WHERE status != 'queued' AND created_at < ?", (now - OUTBOX_TTL_DAYS * 86400,)
+            )
+            self.conn.execute('DELETE FROM summaries WHERE created_at < ?', (int(now - SUMMARY_TTL_DAYS * 86400),))
+            self.conn.execute(
+                'DELETE FROM candidates WHERE COALESCE(published, queued_at) < ? '
+                'OR url IN (SELECT url FROM posted)',
+                (now - CANDIDATE_MAX_AGE_HOURS * 3600,)
+            )
+            # Workers that stopped without leaving
+            self.conn.execute('DELETE FROM workers WHERE heartbeat < ?', (now - 86400,))
+        if posted or seen:
+            logger.info(f"Pruned {posted} posted and {seen} seen stories from the store")
@@ -0,0 +1,34 @@
+import sys
+
+
+class Story:
+    """One candidate story.
+
+    Slotted rather than a dict, since the daemon keeps tens of thousands of these.
+    `source` and `type` are interned. `published` is epoch seconds, or None when
+    the source gives no date. `hours_old` is set by set_ages once per cycle."""
+
+    __slots__ = ('title', 'content', 'url', 'type', 'source', 'published', 'hours_old',
+                 'matches', 'simhash', 'queued_at')
+
+    def __init__(self, title, content, url, type, source, published=None):
+        self.title = title
+        self.content = content
+        self.url = url
+        self.type = sys.intern(type)
+        self.source = sys.intern(source)
+        self.published = published
+        self.hours_old = None
+        self.matches = None
+        self.simhash = None
+        self.queued_at = None
+
+    def __repr__(self):
+        return f"Story({self.source}: {self.title!r})"
+
+
+def set_ages(stories, now):
+    """Set hours_old for every dated story against one `now` (epoch seconds)"""
+    for story in stories:
+        if story.published is not None:
+            story.hours_old = (now - story.published) / 3600
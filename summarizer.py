@@ -0,0 +1,117 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+
+from http_client import post_json
+from metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+# Base URL of an OpenAI-compatible API (e.g. http://127.0.0.1:8000/v1 for a local server).
+# Unset, posts come from the plain formatter.
+SUMMARIZER_URL = os.getenv('SUMMARIZER_URL', '')
+SUMMARIZER_MODEL = os.getenv('SUMMARIZER_MODEL', 'gpt-4o-mini')
+SUMMARIZER_API_KEY = os.getenv('SUMMARIZER_API_KEY', '')
+# Hard limit (seconds) on one model call; past it the plain formatter is used
+SUMMARIZER_BUDGET = float(os.getenv('SUMMARIZER_BUDGET', '4'))
+# Most stories written in one call: the one being posted plus the likeliest next ones
+SUMMARIZER_BATCH = int(os.getenv('SUMMARIZER_BATCH', '5'))
+# After a failed call, skip the model for this long rather than spend the budget on every post
+SUMMARIZER_COOLDOWN = float(os.getenv('SUMMARIZER_COOLDOWN', '300'))
+MAX_POST_LENGTH = 280
+
+SYSTEM_PROMPT = (
+    "You write short, factual news posts for X in the style of WatcherGuru. For each numbered "
+    "story, write one post under 240 characters that leads with the key fact. Start with "
+    "'BREAKING: ' only for genuinely breaking news. No hashtags, links or emoji. Reply with JSON "
+    'only, in the form {"posts": [{"id": 1, "text": "..."}]}.'
+)
+
+
+def content_hash(story):
+    """Cache key for a story's summary; changes with the title, the text or the model"""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in (SUMMARIZER_MODEL, story.title, story.content):
+        digest.update(part.encode())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def parse_posts(content):
+    """Post text by story number from the model's JSON reply (tolerating a code fence)"""
+    content = re.sub(r'^```(?:json)?\s*|\s*```$', '', content.strip())
+    return {int(post['id']): str(post['text']) for post in json.loads(content)['posts']}
+
+
+def clean_post(text):
+    text = ' '.join((text or '').split())
+    if len(text) > MAX_POST_LENGTH:
+        text = text[:MAX_POST_LENGTH - 3] + '...'
+    return text
+
+
+class Summarizer:
+    """Model-written posts, cached by content hash in the story store and written in batches
+    within a latency budget. Anything it can't provide falls back to the plain formatter"""
+
+    def __init__(self, store):
+        self.store = store
+        self.enabled = bool(SUMMARIZER_URL)
+        self.endpoint = SUMMARIZER_URL.rstrip('/') + '/chat/completions'
+        self.retry_at = 0.0
+
+    @property
+    def batch_size(self):
+        """How many candidates are worth keeping around to summarize together"""
+        return SUMMARIZER_BATCH if self.enabled else 1
+
+    def summaries(self, stories):
+        """Summaries for `stories` by content hash: cached ones, plus what one model call
+        writes for up to SUMMARIZER_BATCH of the rest (earlier stories first)"""
+        if not self.enabled or not stories:
+            return {}
+        by_hash = {content_hash(story): story for story in stories}
+        found = self.store.cached_summaries(by_hash)
+        METRICS.inc('summaries', len(found), result='cached')
+        missing = [(key, story) for key, story in by_hash.items() if key not in found]
+        if missing and time.monotonic() >= self.retry_at:
+            written = self.write(missing[:SUMMARIZER_BATCH])
+            if written:
+                self.store.save_summaries(written)
+                found.update(written)
+        return found
+
+    def write(self, batch):
+        """One model call for a batch of (hash, story) pairs. Returns {} on any failure"""
+        prompt = '\n\n'.join(
+            f"Story {i}: {story.title}\n{story.content}" for i, (_, story) in enumerate(batch, 1)
+        )
+        payload = {
+            'model': SUMMARIZER_MODEL,
+            'temperature': 0.2,
+            'messages': [
+                {'role': 'system', 'content': SYSTEM_PROMPT},
+                {'role': 'user', 'content': prompt}
+            ]
+        }
+        headers = {'Authorization': f'Bearer {SUMMARIZER_API_KEY}'} if SUMMARIZER_API_KEY else None
+        try:
+            with METRICS.span('summarize'):
+                reply = post_json(self.endpoint, payload, timeout=SUMMARIZER_BUDGET, headers=headers)
+            posts = parse_posts(reply['choices'][0]['message']['content'])
+        except Exception as e:
+            self.retry_at = time.monotonic() + SUMMARIZER_COOLDOWN
+            METRICS.inc('summaries', len(batch), result='error')
+            logger.warning(f"Summarizer unavailable, using the plain formatter for {SUMMARIZER_COOLDOWN:.0f}s: {e}")
+            return {}
+
+        written = {}
+        for i, (key, _) in enumerate(batch, 1):
+            text = clean_post(posts.get(i))
+            if text:
+                written[key] = text
+        METRICS.inc('summaries', len(written), result='written')
+        return written
@@ -0,0 +1,81 @@
+import time
+
+import pytest
+
+from breaker import BREAKER_COOLDOWN, BREAKER_FAILURE_THRESHOLD, CLOSED, HALF_OPEN, OPEN, CircuitBreakers
+from store import StoryStore
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock(time.time())
+    monkeypatch.setattr(time, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def store(tmp_path):
+    return StoryStore(str(tmp_path / 'newsbot.db'))
+
+
+def fail(breakers, times=1):
+    for _ in range(times):
+        breakers.record_failure('Feed', 0.1, 'HTTP 503')
+
+
+def test_opens_after_the_threshold(store, clock):
+    breakers = CircuitBreakers(store)
+    fail(breakers, BREAKER_FAILURE_THRESHOLD - 1)
+    assert breakers.allow('Feed')
+    assert breakers.health['Feed']['state'] == CLOSED
+    fail(breakers)
+    assert breakers.health['Feed']['state'] == OPEN
+    assert not breakers.allow('Feed')
+
+
+def test_half_opens_after_the_cooldown(store, clock):
+    breakers = CircuitBreakers(store)
+    fail(breakers, BREAKER_FAILURE_THRESHOLD)
+    clock.now += BREAKER_COOLDOWN - 1
+    assert not breakers.allow('Feed')
+    clock.now += 1
+    assert breakers.allow('Feed')
+    assert breakers.health['Feed']['state'] == HALF_OPEN
+    breakers.record_success('Feed', 0.1)
+    assert breakers.health['Feed']['state'] == CLOSED
+    assert breakers.health['Feed']['failures'] == 0
+
+
+def test_failed_probe_doubles_the_cooldown(store, clock):
+    breakers = CircuitBreakers(store)
+    fail(breakers, BREAKER_FAILURE_THRESHOLD)
+    clock.now += BREAKER_COOLDOWN
+    assert breakers.allow('Feed')
+    fail(breakers)
+    assert breakers.health['Feed']['state'] == OPEN
+    assert breakers.health['Feed']['cooldown'] == 2 * BREAKER_COOLDOWN
+    clock.now += BREAKER_COOLDOWN
+    assert not breakers.allow('Feed')
+    clock.now += BREAKER_COOLDOWN
+    assert breakers.allow('Feed')
+
+
+def test_state_survives_a_reload(store, clock):
+    breakers = CircuitBreakers(store)
+    fail(breakers, BREAKER_FAILURE_THRESHOLD)
+    clock.now += BREAKER_COOLDOWN
+    breakers.allow('Feed')
+    fail(breakers)
+    reloaded = CircuitBreakers(StoryStore(store.path))
+    assert reloaded.health['Feed'] == breakers.health['Feed']
+    assert not reloaded.allow('Feed')
+    clock.now += 2 * BREAKER_COOLDOWN
+    assert reloaded.allow('Feed')
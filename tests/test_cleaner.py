@@ -0,0 +1,22 @@
+import pytest
+
+from cleaner import clean_text
+
+
+@pytest.mark.parametrize('raw, clean', [
+    ('<p>Bitcoin <b>surges</b>.</p>', 'Bitcoin surges.'),
+    ('Fees &amp; limits<br/>raised', 'Fees & limits raised'),
+    ('&lt;p&gt;Escaped twice&lt;/p&gt;', 'Escaped twice'),
+    ('<script>track()</script>Story<!-- ad -->', 'Story'),
+    ('5 < 10 & 20 > 3', '5 < 10 & 20 > 3'),
+    ('a < b and c > d', 'a < b and c > d'),
+    ('Fed rate <5% for now', 'Fed rate <5% for now'),
+])
+def test_clean_text(raw, clean):
+    assert clean_text(raw) == clean
+
+
+def test_cut_inside_a_tag_drops_it():
+    srcset = ', '.join(f'https://cdn.example.com/img-{width}.jpg {width}w' for width in range(100, 2000, 100))
+    raw = f'<p>Bitcoin surges</p><img srcset="{srcset}"><p>More text</p>'
+    assert clean_text(raw, limit=40) == 'Bitcoin surges'
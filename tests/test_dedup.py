@@ -0,0 +1,135 @@
+import itertools
+
+from dedup import DEDUP_MAX_DISTANCE, SimhashIndex, hamming, story_fingerprint
+from story import Story
+
+# The same story as headlined by different outlets
+SAME_STORY = [
+    ("Bitcoin surges past $100,000 as ETF inflows hit record",
+     "Bitcoin Surges Past $100,000 As ETF Inflows Hit Record High"),
+    ("SEC approves spot Ether ETFs", "SEC approves spot Ether ETFs in landmark decision"),
+    ("Bitcoin tops $100,000 for the first time", "Bitcoin breaks $100,000 for first time ever"),
+    ("OpenAI releases GPT-5 to all ChatGPT users", "OpenAI rolls out GPT-5 to all ChatGPT users"),
+    ("Bybit hacked for $1.5 billion in Ethereum", "Crypto exchange Bybit hacked for $1.5 billion in Ethereum"),
+    ("Nvidia becomes world's most valuable company",
+     "Nvidia becomes the world's most valuable company, overtaking Microsoft"),
+    ("Trump signs executive order creating strategic bitcoin reserve",
+     "Trump signs order to create Strategic Bitcoin Reserve"),
+    ("El Salvador buys 11 more bitcoin", "El Salvador buys another 11 bitcoin"),
+    ("BlackRock's bitcoin ETF surpasses $50 billion in assets", "BlackRock bitcoin ETF surpasses $50 billion in assets"),
+    ("Anthropic raises $4 billion from Amazon", "Amazon invests another $4 billion in Anthropic"),
+    ("Ethereum price crashes 20% in an hour", "Ethereum crashes 20% in one hour"),
+    ("Google unveils Gemini 2.0", "Google unveils Gemini 2.0, its most capable AI model yet"),
+    ("MicroStrategy buys $2 billion more bitcoin", "MicroStrategy buys another $2 billion of bitcoin"),
+    ("Fed cuts interest rates by 50 basis points", "Federal Reserve cuts interest rates by 50 basis points"),
+    ("Coinbase suffers data breach affecting 1% of users", "Coinbase data breach affects 1% of users"),
+    ("Binance CEO Changpeng Zhao pleads guilty, steps down",
+     "Binance's Changpeng Zhao steps down after pleading guilty"),
+    ("Tesla sells 75% of its bitcoin holdings", "Tesla has sold 75% of its bitcoin holdings"),
+    ("Ripple wins partial victory against SEC", "Ripple scores partial win in SEC lawsuit"),
+    ("Meta releases Llama 3 open-source model", "Meta releases Llama 3, its latest open-source AI model"),
+    ("US government moves $2 billion in seized bitcoin", "US government moves $2 billion worth of seized Bitcoin"),
+    ("Microsoft to invest $10 billion in OpenAI", "Microsoft invests $10 billion in ChatGPT maker OpenAI"),
+    ("FTX files for bankruptcy", "Crypto exchange FTX files for bankruptcy protection"),
+    ("Bitcoin falls below $60,000", "Bitcoin drops below $60,000"),
+]
+
+# Different stories whose headlines differ by a word or a figure
+LOOKALIKES = [
+    ("Bitcoin surges past $100,000", "Ether surges past $4,000"),
+    ("SEC approves spot Ether ETFs", "SEC approves spot Solana ETFs"),
+    ("SEC approves spot Ether ETFs", "SEC rejects spot Ether ETFs"),
+    ("Bybit hacked for $1.5 billion", "Bybit hacked for $15 million"),
+    ("El Salvador buys 11 more bitcoin", "El Salvador buys 21 more bitcoin"),
+    ("MicroStrategy buys $2 billion more bitcoin", "MicroStrategy buys $500 million more bitcoin"),
+    ("Fed cuts interest rates by 50 basis points", "Fed raises interest rates by 25 basis points"),
+    ("OpenAI releases GPT-5", "OpenAI releases GPT-4o"),
+    ("Google unveils Gemini 2.0", "Google unveils Gemini 2.5"),
+    ("Nvidia stock falls 10%", "Apple stock falls 10%"),
+    ("Whale moves 10,000 BTC to Binance", "Whale moves 5,000 ETH to Coinbase"),
+    ("Bitcoin crashes below $90,000", "Bitcoin climbs above $90,000"),
+    ("Bitcoin falls below $60,000", "Bitcoin falls below $50,000"),
+    ("Tesla sells 75% of its bitcoin holdings", "Tesla buys $1.5 billion in bitcoin"),
+    ("FTX files for bankruptcy", "Celsius files for bankruptcy"),
+    ("Meta releases Llama 3", "Meta releases Llama 2"),
+    ("Microsoft to invest $10 billion in OpenAI", "Amazon to invest $4 billion in Anthropic"),
+    ("US government moves $2 billion in seized bitcoin", "German government moves $200 million in seized bitcoin"),
+    ("Ripple wins partial victory against SEC", "Coinbase wins partial victory against SEC"),
+]
+
+# A day of unrelated headlines from the same beat
+UNRELATED = [
+    "Bitcoin hits $70,000 as halving approaches",
+    "Bitcoin miners sell record amount of BTC",
+    "Bitcoin ETF outflows reach $500 million",
+    "Bitcoin network hashrate reaches all-time high",
+    "Bitcoin dominance climbs to 55%",
+    "Bitcoin drops 8% after hot inflation data",
+    "Ethereum gas fees fall to lowest level since 2020",
+    "Ethereum developers set date for Dencun upgrade",
+    "Ether price jumps 10% on ETF news",
+    "SEC sues Coinbase over unregistered securities",
+    "SEC delays decision on Franklin bitcoin ETF",
+    "SEC charges Binance with 13 securities violations",
+    "Coinbase reports $1.1 billion quarterly revenue",
+    "Binance exits Canadian market",
+    "Tether launches gold-backed stablecoin",
+    "Solana outage halts block production for 5 hours",
+    "Solana price rallies 15% on memecoin mania",
+    "Curve Finance exploited for $70 million",
+    "Ronin bridge hacked for $625 million",
+    "Kraken settles with SEC for $30 million",
+    "BlackRock files for spot Ethereum ETF",
+    "Hong Kong approves spot bitcoin and ether ETFs",
+    "OpenAI launches ChatGPT Enterprise",
+    "Anthropic releases Claude 3 model family",
+    "Nvidia reports record data center revenue",
+    "Nvidia stock jumps 16% after earnings",
+    "xAI raises $6 billion in funding round",
+    "Whale moves 40,000 ETH to Kraken",
+    "Mt. Gox begins repaying creditors",
+    "FTX founder Sam Bankman-Fried sentenced to 25 years",
+]
+
+
+def distance(a, b):
+    return hamming(*(story_fingerprint(Story(title, '', 'https://example.com', 'crypto', 'X')) for title in (a, b)))
+
+
+def test_reworded_headlines_are_duplicates():
+    caught = [pair for pair in SAME_STORY if distance(*pair) <= DEDUP_MAX_DISTANCE]
+    # Short headlines leave SimHash little to work with; most rewrites must still be caught
+    assert len(caught) >= 0.7 * len(SAME_STORY)
+    assert SAME_STORY[0] in caught and SAME_STORY[1] in caught
+
+
+def test_lookalike_headlines_are_kept():
+    merged = [pair for pair in LOOKALIKES if distance(*pair) <= DEDUP_MAX_DISTANCE]
+    assert len(merged) <= 1
+
+
+def test_unrelated_headlines_are_kept():
+    for a, b in itertools.combinations(UNRELATED, 2):
+        assert distance(a, b) > DEDUP_MAX_DISTANCE, (a, b)
+
+
+def test_index_finds_everything_within_distance():
+    index = SimhashIndex()
+    index.add(0)
+    assert index.near((1 << DEDUP_MAX_DISTANCE) - 1)
+    assert index.near(int('10' * DEDUP_MAX_DISTANCE, 2))
+    assert not index.near((1 << (DEDUP_MAX_DISTANCE + 1)) - 1)
+
+
+def test_posted_index_tops_up_instead_of_rebuilding(tmp_path):
+    from store import StoryStore
+    path = str(tmp_path / 'newsbot.db')
+    store, other_process = StoryStore(path), StoryStore(path)
+    store.mark_posted('https://example.com/a', 0)
+    index = store.posted_index()
+    assert index.near(1)
+    other_process.mark_posted('https://example.com/b', (1 << 64) - 1)
+    # Same index, with only the new row added
+    assert store.posted_index() is index
+    assert sum(map(len, index.buckets[0].values())) == 2
+    assert index.near((1 << 64) - 2)
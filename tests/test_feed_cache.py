@@ -0,0 +1,105 @@
+import time
+from email.utils import formatdate
+
+import pytest
+
+from feed_cache import FeedCache
+from sources import source
+
+URL = 'https://example.com/feed'
+NOW = int(time.time())
+
+
+def entry(guid, published):
+    return {'id': guid, 'link': f'https://example.com/{guid}', 'title': guid, 'summary': '',
+            'published_parsed': list(time.gmtime(published)[:6]) if published else None}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return FeedCache(str(tmp_path / 'feed_cache.json'))
+
+
+def test_unseen_stops_at_a_seen_guid(cache):
+    cache.advance(URL, [entry('b', NOW - 60), entry('a', NOW - 120)])
+    fresh = cache.unseen(URL, [entry('c', NOW), entry('b', NOW - 60), entry('a', NOW - 120)])
+    assert [e['id'] for e in fresh] == ['c']
+
+
+def test_unseen_stops_at_an_older_timestamp(cache):
+    cache.advance(URL, [entry('b', NOW - 60)])
+    # 'a' dropped out of the remembered ids but is older than the high-water mark
+    fresh = cache.unseen(URL, [entry('c', NOW), entry('a', NOW - 120), entry('z', NOW - 30)])
+    assert [e['id'] for e in fresh] == ['c']
+
+
+def test_unseen_keeps_undated_entries(cache):
+    cache.advance(URL, [entry('b', NOW - 60)])
+    fresh = cache.unseen(URL, [entry('c', None), entry('b', NOW - 60)])
+    assert [e['id'] for e in fresh] == ['c']
+
+
+def test_advance_keeps_the_newest_time_and_ids(cache):
+    cache.advance(URL, [entry('b', NOW - 60)])
+    cache.advance(URL, [entry('a', NOW - 120)])
+    high_water = cache.feeds[URL]['high_water']
+    assert high_water['published'] == NOW - 60
+    assert high_water['ids'] == ['a', 'b']
+
+
+def test_unseen_without_high_water_returns_everything(cache):
+    entries = [entry('b', NOW - 60), entry('a', NOW - 120)]
+    assert cache.unseen(URL, entries) == entries
+
+
+class Response:
+    def __init__(self, status_code, content=b''):
+        self.status_code = status_code
+        self.content = content
+        self.headers = {'ETag': f'"{len(content)}"'} if content else {}
+
+    def raise_for_status(self):
+        pass
+
+
+def rss(*guids):
+    items = ''.join(
+        f'<item><title>Story {guid}</title><link>https://example.com/{guid}</link>'
+        f'<guid>{guid}</guid><pubDate>{formatdate(NOW - age)}</pubDate></item>'
+        for guid, age in guids
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>Feed</title>{items}</channel></rss>'.encode()
+
+
+@pytest.fixture
+def bot(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('STORE_PATH', str(tmp_path / 'newsbot.db'))
+    import main
+    return main.NewsBot()
+
+
+def serve(monkeypatch, response):
+    import main
+    monkeypatch.setattr(main, 'fetch_url', lambda url, timeout=None, headers=None: response)
+
+
+def test_fetch_rss_merges_new_entries_with_cached_ones(bot, monkeypatch):
+    src = source('Feed', URL, 'rss', 'crypto')
+    serve(monkeypatch, Response(200, rss(('b', 60), ('a', 120))))
+    assert [s.url for s in bot.fetch_rss(src, 5, incremental=True)] == ['https://example.com/b', 'https://example.com/a']
+    serve(monkeypatch, Response(200, rss(('c', 0), ('b', 60), ('a', 120))))
+    assert [s.url for s in bot.fetch_rss(src, 5, incremental=True)] == ['https://example.com/c']
+    assert [e['id'] for e in bot.feed_cache.entries(URL)] == ['c', 'b', 'a']
+
+
+def test_fetch_rss_reuses_the_cache_on_304(bot, monkeypatch):
+    src = source('Feed', URL, 'rss', 'crypto')
+    serve(monkeypatch, Response(200, rss(('b', 60), ('a', 120))))
+    bot.fetch_rss(src, 5, incremental=True)
+    serve(monkeypatch, Response(304))
+    # Nothing new for incremental fetches, and the cache is left as it was
+    assert bot.fetch_rss(src, 5, incremental=True) == []
+    assert [e['id'] for e in bot.feed_cache.entries(URL)] == ['b', 'a']
+    # A full fetch maps the cached entries
+    assert [s.url for s in bot.fetch_rss(src, 5)] == ['https://example.com/b', 'https://example.com/a']
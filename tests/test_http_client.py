@@ -0,0 +1,103 @@
+from email.utils import formatdate
+
+import pytest
+import requests
+
+import http_client
+
+
+class FakeTime:
+    """Stands in for the time module: sleeping advances the clock"""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class Response:
+    def __init__(self, status_code, retry_after=None):
+        self.status_code = status_code
+        self.headers = {'Retry-After': retry_after} if retry_after is not None else {}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeTime()
+    monkeypatch.setattr(http_client, 'time', clock)
+    monkeypatch.setattr(http_client.random, 'uniform', lambda low, high: 1.0)
+    return clock
+
+
+def serve(monkeypatch, *replies):
+    """Answer successive requests with `replies`; callables are called first, exceptions raised"""
+    replies = list(replies)
+    calls = []
+
+    def request(method, url, deadline, timeout, headers, json=None):
+        calls.append(timeout)
+        reply = replies.pop(0)
+        if callable(reply):
+            reply = reply()
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    monkeypatch.setattr(http_client, '_request_before', request)
+    return calls
+
+
+@pytest.mark.parametrize('status', sorted(http_client.RETRY_STATUSES))
+def test_retries_429_and_5xx(clock, monkeypatch, status):
+    calls = serve(monkeypatch, Response(status), Response(200))
+    assert http_client.fetch_url('https://example.com/feed').status_code == 200
+    assert len(calls) == 2
+    assert clock.sleeps == [http_client.HTTP_BACKOFF_BASE]
+
+
+def test_other_errors_are_not_retried(clock, monkeypatch):
+    calls = serve(monkeypatch, Response(404))
+    assert http_client.fetch_url('https://example.com/feed').status_code == 404
+    assert len(calls) == 1
+
+
+def test_backoff_doubles_then_gives_up(clock, monkeypatch):
+    calls = serve(monkeypatch, *[Response(503)] * (http_client.HTTP_MAX_RETRIES + 1))
+    assert http_client.fetch_url('https://example.com/feed', timeout=60).status_code == 503
+    assert len(calls) == http_client.HTTP_MAX_RETRIES + 1
+    assert clock.sleeps == [http_client.HTTP_BACKOFF_BASE * 2 ** i for i in range(http_client.HTTP_MAX_RETRIES)]
+
+
+@pytest.mark.parametrize('retry_after', ['3', formatdate(1_000_003.0, usegmt=True)])
+def test_honours_retry_after(clock, monkeypatch, retry_after):
+    serve(monkeypatch, Response(429, retry_after), Response(200))
+    assert http_client.fetch_url('https://example.com/feed').status_code == 200
+    assert clock.sleeps == [3.0]
+
+
+def test_retry_after_past_the_deadline_gives_up(clock, monkeypatch):
+    calls = serve(monkeypatch, Response(429, '30'), Response(200))
+    assert http_client.fetch_url('https://example.com/feed', timeout=10).status_code == 429
+    assert len(calls) == 1
+    assert clock.sleeps == []
+
+
+def test_connection_errors_raise_at_the_deadline(clock, monkeypatch):
+    def slow_failure():
+        clock.now += 4
+        return requests.ConnectionError('refused')
+
+    calls = serve(monkeypatch, slow_failure, slow_failure, slow_failure)
+    with pytest.raises(requests.ConnectionError):
+        http_client.fetch_url('https://example.com/feed', timeout=5)
+    # 4s spent and 0.5s of backoff leave 0.5s for the retry, which also fails
+    assert calls == [5, 0.5]
@@ -0,0 +1,46 @@
+import pytest
+
+from keywords import MATCHER
+
+
+@pytest.mark.parametrize('title, category', [
+    ('Hackers drain $50M from bridge', 'security'),
+    ('Bitcoin surges past $100,000', 'price'),
+    ('Bitcoin surging as ETF inflows grow', 'price'),
+    ('Ether spiking after upgrade', 'price'),
+    ('Crypto mining banned in Kosovo', 'priority'),
+    ('Solana plunging on outage', 'priority'),
+    ('Dogecoin rallies 20%', 'priority'),
+    ('Dogecoin rallied overnight', 'priority'),
+    ('Whale transferred 10,000 BTC', 'priority'),
+    ('JUST  IN: Fed holds rates', 'priority'),
+    ('Exchange crashes after outage', 'price'),
+    ('Bitcoin miners moved coins', 'priority'),
+])
+def test_inflections_match(title, category):
+    assert category in MATCHER.categories(title)
+
+
+@pytest.mark.parametrize('title', [
+    'Urban planning conference opens',
+    'Local bank opens new branch',
+    'Banner ads return to the homepage',
+    'Hackathon winners named today',
+    'Band Protocol token jumps',
+    'Apple iPod returns',
+])
+def test_lookalikes_dont_match(title):
+    assert MATCHER.categories(title) == frozenset()
+
+
+@pytest.mark.parametrize('title, hits', [
+    ('Rock band signs record deal', ['record']),
+    ('Court bans iPod resales', ['court', 'bans']),
+])
+def test_only_keywords_hit(title, hits):
+    assert MATCHER.pattern.findall(title.lower()) == hits
+
+
+@pytest.mark.parametrize('title', ['İPO filing delayed', 'HACKİNG group returns'])
+def test_dotted_capital_i_doesnt_raise(title):
+    MATCHER.categories(title)
@@ -0,0 +1,21 @@
+import time
+
+from poster import OUTBOX_MAX_ATTEMPTS, Account, Poster
+from store import StoryStore
+
+
+class BrokenAccount(Account):
+    @property
+    def client(self):
+        raise RuntimeError('missing credentials')
+
+
+def test_client_errors_use_up_attempts(tmp_path):
+    store = StoryStore(str(tmp_path / 'newsbot.db'))
+    account = BrokenAccount('default', 'TWITTER_')
+    poster = Poster(store, {'default': account})
+    store.enqueue_posts('default', ['hello'])
+    post_id, _, content, reply_to = store.due_posts()[0]
+    for _ in range(OUTBOX_MAX_ATTEMPTS):
+        assert not poster.send(post_id, account, content, reply_to)
+    assert store.due_posts(now=time.time() + 10 ** 6) == []
@@ -0,0 +1,47 @@
+import random
+import time
+
+import pytest
+
+import ranking
+from ranking import TopK, scored_top
+from story import Story, set_ages
+
+TITLES = [
+    'BREAKING: Exchange hacked for $200 million',
+    'Bitcoin surges to record high',
+    'Ether price crash wipes out leveraged longs',
+    'Protocol announces partnership with payments firm',
+    'Weekly roundup of crypto news',
+]
+
+
+def candidates(count, now):
+    rng = random.Random(count)
+    stories = []
+    for i in range(count):
+        published = None if i % 7 == 0 else now - rng.uniform(0, 30 * 3600)
+        stories.append(Story(f"{rng.choice(TITLES)} {i}", '', f"https://example.com/{i}", 'crypto',
+                             rng.choice(['CoinDesk', 'Decrypt', 'Unknown']), published))
+    set_ages(stories, now)
+    return stories
+
+
+def test_vectorized_top_matches_heap(monkeypatch):
+    pytest.importorskip('numpy')
+    now = time.time()
+    stories = candidates(2000, now)
+    vectorized = scored_top(stories, 10, now)
+    monkeypatch.setattr(ranking, 'RANK_VECTORIZE_MIN', len(stories) + 1)
+    plain = scored_top(stories, 10, now)
+    assert [score for score, _ in vectorized] == pytest.approx([score for score, _ in plain])
+
+
+def test_batch_tops_make_the_overall_top():
+    now = time.time()
+    stories = candidates(300, now)
+    top = TopK(5)
+    for start in range(0, len(stories), 40):
+        for score, story in scored_top(stories[start:start + 40], 5, now):
+            top.push(score, story)
+    assert top.best() == [story for _, story in scored_top(stories, 5, now)]
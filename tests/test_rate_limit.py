@@ -0,0 +1,90 @@
+import time
+
+import pytest
+
+from story import Story
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def make_bot(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('STORE_PATH', str(tmp_path / 'newsbot.db'))
+    from main import NewsBot
+    bot = NewsBot()
+    bot.should_post_now = bot.check_rate_limit  # Ignore the time of day
+    bot.poster.drain = lambda: 0
+    return bot
+
+
+@pytest.fixture
+def bot(tmp_path, monkeypatch):
+    monkeypatch.delenv('GITHUB_ACTIONS', raising=False)
+    return make_bot(tmp_path, monkeypatch)
+
+
+@pytest.fixture
+def actions_bot(tmp_path, monkeypatch):
+    """Built the way the workflow builds it"""
+    monkeypatch.setenv('GITHUB_ACTIONS', 'true')
+    return make_bot(tmp_path, monkeypatch)
+
+
+def scheduled_run(bot, monkeypatch, clock, start, fetch_seconds=30):
+    """One one-shot run starting at `start` whose fetch stage takes `fetch_seconds`.
+    Returns whether it queued a post"""
+    import main
+    clock.now = start
+    run = int(start)
+    queued = []
+
+    def select_best(bot, sources, k=1, group=None, groups=(None,)):
+        clock.now += fetch_seconds
+        story = Story(f"Breaking story {run}", '', f"https://example.com/{run}", 'crypto', 'CoinDesk')
+        return {key: [story] for key in groups}, {'fetched': 1, 'interesting': 1, 'new': 1}
+
+    monkeypatch.setattr(main, 'select_best', select_best)
+    post_story = bot.post_story
+    monkeypatch.setattr(bot, 'post_story', lambda *args: queued.append(post_story(*args)) or queued[-1])
+    bot.run_posting_cycle()
+    return any(queued)
+
+
+def test_runs_two_hours_apart_both_post(bot, monkeypatch):
+    clock = Clock(time.time())
+    monkeypatch.setattr(time, 'time', clock)
+    start = clock.now
+    assert scheduled_run(bot, monkeypatch, clock, start)
+    assert scheduled_run(bot, monkeypatch, clock, start + 7200)
+    assert scheduled_run(bot, monkeypatch, clock, start + 2 * 7200)
+
+
+def test_run_inside_the_window_is_skipped(bot, monkeypatch):
+    clock = Clock(time.time())
+    monkeypatch.setattr(time, 'time', clock)
+    start = clock.now
+    assert scheduled_run(bot, monkeypatch, clock, start)
+    assert not scheduled_run(bot, monkeypatch, clock, start + 3600)
+
+
+def test_scheduler_jitter_within_slack(actions_bot, monkeypatch):
+    clock = Clock(time.time())
+    monkeypatch.setattr(time, 'time', clock)
+    start = clock.now
+    # The first run started late, the next one on time
+    assert scheduled_run(actions_bot, monkeypatch, clock, start + 300)
+    assert scheduled_run(actions_bot, monkeypatch, clock, start + 7200)
+
+
+def test_jitter_outside_actions_waits(bot, monkeypatch):
+    clock = Clock(time.time())
+    monkeypatch.setattr(time, 'time', clock)
+    start = clock.now
+    assert scheduled_run(bot, monkeypatch, clock, start + 300)
+    assert not scheduled_run(bot, monkeypatch, clock, start + 7200)
@@ -0,0 +1,24 @@
+from story import Story
+from summarizer import content_hash
+
+
+def test_post_story_makes_one_model_call(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('STORE_PATH', str(tmp_path / 'newsbot.db'))
+    import main
+    bot = main.NewsBot()
+    bot.summarizer.enabled = True
+    story = Story('Bitcoin surges to record high', 'Details.', 'https://example.com/a', 'crypto', 'CoinDesk')
+    upcoming = Story('Ether follows', 'More.', 'https://example.com/b', 'crypto', 'CoinDesk')
+    calls = []
+
+    def write(batch):
+        calls.append(batch)
+        # The reply covers the runner-up but leaves out the story being posted
+        return {content_hash(upcoming): 'Ether follows Bitcoin higher'}
+
+    monkeypatch.setattr(bot.summarizer, 'write', write)
+    assert bot.post_story(story, [upcoming])
+    assert len(calls) == 1
+    content = bot.store.conn.execute('SELECT content FROM outbox').fetchone()[0]
+    assert content == bot.summarize_news(story)